@@ -1,311 +1,485 @@
 import streamlit as st
-import random
 import os
-import time
-from PIL import Image
+import uuid
+
+from assets import clear_layers, layer_size
+from cache import open_cache
+from canvas_component import delta_canvas, layered_canvas, publish_layers
+from catalog import asset, load_catalog, selection_from_state, selection_mask, session_defaults
+from calibrate import POSTERIOR_PATH
+from engine import load_posterior, run_trial
+from jobs import JobQueue
+from memory import MemoryMonitor
+from optimizer import suggest
+from outcome import RENDERER as OUTCOME_RENDERER, RunLayer
+from pharmacology import dose_curves, dose_key, dose_multipliers
+from profiles import profile_css, select_profile
+from report import report_chunks
+from runlog import RunLog, session_runs
+from sequencer import FramePool
+from sessionstore import decode_session, encode_session, open_session_store, valid_session_id
+from sprites import sprite_css, sprite_html, sprite_sheet
+from stats import StatsStore
+from tiles import TileRenderer
+from transitions import TransitionStore
 
 # ================================================
-# PAGE CONFIG
+# PAGE CONFIG + STYLE
 # ================================================
 st.set_page_config(page_title="Axon Regeneration Simulator", layout="wide")
 
-# Global styling
-st.markdown("""
-<style>
-html, body, [class*="css"] {
-    font-size: 22px !important;
-}
-h1, h2, h3 {
-    font-weight: 800 !important;
-}
-.toolbox-panel {
-    background-color: rgba(25, 25, 35, 0.92);
-    padding: 1.5rem;
-    border-radius: 1rem;
-    border: 1px solid rgba(255,255,255,0.12);
-}
-div.stButton > button {
-    width: 100% !important;
-    font-size: 22px !important;
-    font-weight: 700 !important;
-    height: 60px !important;
-}
-</style>
-""", unsafe_allow_html=True)
+# One app serves every layout: ?profile=app4 in the URL, AXON_PROFILE, or the default in profiles.json.
+PROFILE = select_profile(st.query_params.get("profile"))
+CANVAS_WIDTH = PROFILE.canvas_width
+
+st.markdown(profile_css(PROFILE), unsafe_allow_html=True)
 
+# Toolbox icons come from one prebuilt sheet when there is one for this icon size.
+SPRITES = sprite_sheet(PROFILE.icon_size)
+if SPRITES:
+    st.markdown(sprite_css(SPRITES), unsafe_allow_html=True)
 
 # ================================================
 # PATH HELPERS
 # ================================================
-def icon(name): return os.path.join("icons", name)
-def gif(name): return os.path.join("gifs", name)
-
-BASE_IMAGE = icon("injured_axon_gap.png")
-
+def icon(name): return asset(os.path.join("icons", name))
+def gif(name): return asset(os.path.join("gifs", name))
 
 # ================================================
-# INIT SESSION STATE
+# CATALOG
 # ================================================
-if "intrinsic" not in st.session_state:
-    st.session_state.intrinsic = set()
+CATALOG = load_catalog()
+BASE_IMAGE = CATALOG.base_image
+
+@st.cache_resource
+def get_posterior():
+    return load_posterior(POSTERIOR_PATH)
 
-if "support" not in st.session_state:
-    st.session_state.support = None
+@st.cache_resource
+def get_stats_store():
+    return StatsStore()
 
-if "scaffold" not in st.session_state:
-    st.session_state.scaffold = None
+@st.cache_resource
+def get_memory_monitor():
+    return MemoryMonitor.from_env()
 
-if "molecules" not in st.session_state:
-    st.session_state.molecules = set()
+@st.cache_resource
+def get_session_store():
+    return open_session_store()
 
-if "cell_overlay" not in st.session_state:
-    st.session_state.cell_overlay = None
+@st.cache_resource
+def get_run_log():
+    return RunLog()
 
-if "scaffold_overlay" not in st.session_state:
-    st.session_state.scaffold_overlay = None
+@st.cache_resource
+def get_result_cache():
+    return open_cache()
 
-if "temp_animation" not in st.session_state:
-    st.session_state.temp_animation = None
+@st.cache_resource
+def get_job_queue():
+    # Built on the first batch; its worker processes start with the first submit.
+    queue = JobQueue(cache=get_result_cache())
+    get_memory_monitor().register_evictor(queue.evict)
+    return queue
 
-if "play_anim_once" not in st.session_state:
-    st.session_state.play_anim_once = False
+@st.cache_resource
+def get_tile_renderer():
+    return TileRenderer()
 
-if "last_outcome" not in st.session_state:
-    st.session_state.last_outcome = None
+@st.cache_resource
+def get_frame_pool():
+    return FramePool(layer_size(BASE_IMAGE))
 
-if "last_success" not in st.session_state:
-    st.session_state.last_success = None
+@st.cache_resource
+def get_transition_store():
+    return TransitionStore(get_tile_renderer())
 
+OUTCOME_IMAGES = {True: gif("axon_success_gif.png"), False: gif("axon_failure_gif.png")}
 
 # ================================================
-# IMAGE COMPOSITING
+# SESSION STATE DEFAULTS
 # ================================================
-def load_rgba(path):
-    return Image.open(path).convert("RGBA")
+defaults = {
+    **session_defaults(CATALOG),
+    "doses": {},
+    "batch_job": None,
+    "queued_animation": None,
+    "queued_transition": None,
+    "last_outcome": None,
+    "last_success": None,
+    "last_run": None,
+    "last_guided": False
+}
+for k, v in defaults.items():
+    if k not in st.session_state:
+        st.session_state[k] = v
+
+if "session_id" not in st.session_state:
+    # The id lives in the URL so another app process can pick the session up.
+    sid = st.query_params.get("sid")
+    if not valid_session_id(sid):
+        sid = uuid.uuid4().hex
+        st.query_params["sid"] = sid
+    st.session_state.session_id = sid
+
+    store = get_session_store()
+    saved = store.load(sid) if store is not None else None
+    if saved:
+        st.session_state.update(decode_session(CATALOG, saved))
+        st.session_state.saved_session = saved
+
+MONITOR = get_memory_monitor()
+MONITOR.register_evictor(clear_layers)
+MONITOR.register_evictor(get_tile_renderer().clear)
+MONITOR.register_evictor(OUTCOME_RENDERER.clear)
+MONITOR.register_evictor(get_frame_pool().clear)
+MONITOR.register_evictor(get_transition_store().clear)
+MONITOR.begin(st.session_state.session_id)
+
+def persist_session():
+    store = get_session_store()
+    if store is None:
+        return
+    blob = encode_session(CATALOG, st.session_state)
+    if blob != st.session_state.get("saved_session"):
+        store.save(st.session_state.session_id, blob)
+        st.session_state.saved_session = blob
 
+# ================================================
+# IMAGE HANDLING
+# ================================================
 def render_canvas():
-    base = load_rgba(BASE_IMAGE)
+    # An encoded data URL, which st.image passes through without re-encoding.
+    # Under memory pressure the monitor lowers the canvas resolution.
+    reduce = round(1 / MONITOR.canvas_scale)
+    return get_tile_renderer().frame_url(canvas_layers(), reduce)
+
+@st.cache_resource
+def get_published_layers():
+    return publish_layers(CATALOG, OUTCOME_IMAGES.values())
+
+def outcome_layer():
+    if st.session_state.last_run is None:
+        return None
+    return RunLayer(
+        st.session_state.last_run, st.session_state.last_success, st.session_state.last_outcome,
+        guided=st.session_state.last_guided,
+    )
+
+def canvas_layers():
+    layers = [BASE_IMAGE] + [st.session_state[slot] for slot in CATALOG.overlay_order]
+    if st.session_state.last_outcome is None:
+        return layers
+    run = outcome_layer()
+    # Sessions saved before runs were drawn fall back to the stock outcome image.
+    return layers + [run] if run is not None else [OUTCOME_IMAGES[st.session_state.last_outcome]]
+
+def render_client_canvas(canvas):
+    # The browser keeps the canvas; a rerun only sends layer names, or changed patches, and any queued animation.
+    get_published_layers()
+    anim, old_layers = take_queued()
+    layers = canvas_layers()
+    reduce = round(1 / MONITOR.canvas_scale)
+    pool = get_frame_pool()
+    if old_layers:
+        # A transition is one animated image that plays once, shown for as long as a still.
+        anim = (get_transition_store().path(old_layers, layers, reduce),)
+        pool = None
+    nonce = uuid.uuid4().hex if anim else None
+    with canvas:
+        if PROFILE.canvas == "client":
+            layered_canvas(layers, CANVAS_WIDTH, flash=anim, frame_pool=pool, reduce=reduce, nonce=nonce)
+            return
+        # Delta frames: the server composites only what changed since the frame the browser holds.
+        resync = st.session_state.get("canvas")
+        if resync and resync != st.session_state.get("canvas_resync"):
+            st.session_state.canvas_resync = resync
+            st.session_state.canvas_sent = None
+        delta_canvas(get_tile_renderer(), st.session_state.get("canvas_sent"), layers, CANVAS_WIDTH, reduce, flash=anim, frame_pool=pool, nonce=nonce)
+        st.session_state.canvas_sent = (tuple(p for p in layers if p), reduce)
 
-    if st.session_state.cell_overlay:
-        base.alpha_composite(load_rgba(st.session_state.cell_overlay))
+# ================================================
+# ANIMATIONS
+# ================================================
+def queue_animation(frames):
+    st.session_state.queued_animation = tuple(frames)
+
+def queue_transition(old_layers):
+    # The canvas as it was before the tool; the transition runs from it to whatever is drawn next.
+    st.session_state.queued_transition = tuple(old_layers)
+
+def take_queued():
+    queued = st.session_state.queued_animation, st.session_state.queued_transition
+    st.session_state.queued_animation = st.session_state.queued_transition = None
+    return queued
+
+def play_if_queued(canvas):
+    frames, old_layers = take_queued()
+    if not frames and not old_layers:
+        return
+    reduce = round(1 / MONITOR.canvas_scale)
+    if old_layers:
+        get_transition_store().play(canvas, old_layers, canvas_layers(), CANVAS_WIDTH, reduce)
+    else:
+        get_frame_pool().play(canvas, frames, CANVAS_WIDTH, reduce)
+    canvas.image(render_canvas(), width=CANVAS_WIDTH)
 
-    if st.session_state.scaffold_overlay:
-        base.alpha_composite(load_rgba(st.session_state.scaffold_overlay))
+# ================================================
+# OUTCOME DISTRIBUTION
+# ================================================
+def render_distribution(stats):
+    if not stats.n:
+        return
+    st.subheader("📊 Outcome Distribution")
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Runs", stats.n)
+    m2.metric("Mean Probability", f"{stats.mean*100:.1f}% ± {1.96*stats.stderr*100:.1f}")
+    m3.metric("Observed Success", f"{stats.success_rate*100:.1f}%")
+    edges = stats.bin_edges()
+    st.bar_chart(
+        {"Probability": [f"{edges[i]*100:.0f}%" for i in range(len(stats.hist))], "Runs": stats.hist},
+        x="Probability", y="Runs",
+    )
 
-    return base
+# ================================================
+# REPORT
+# ================================================
+def render_report_download(selection, config, doses_key):
+    # Generated on click, on Streamlit's download thread, from what this rerun shows.
+    doses = {k: v for k, v in st.session_state.doses.items() if k in selection}
+    session_id = st.session_state.session_id
+    layers, reduce = canvas_layers(), round(1 / MONITOR.canvas_scale)
+    renderer, stats, run_log = get_tile_renderer(), get_stats_store(), get_run_log()
+
+    def build():
+        run_log.flush()
+        return "".join(report_chunks(
+            CATALOG, selection, doses, stats.get(config, doses_key), renderer.frame_url(layers, reduce),
+            session_runs(session_id, run_log.path),
+        )).encode()
+
+    st.download_button("Download report 📄", data=build, file_name="axon_report.html", mime="text/html",
+                       on_click="ignore")
 
+# ================================================
+# BATCH SIMULATION
+# ================================================
+@st.fragment(run_every=0.5)
+def render_batch_progress(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None or job.status != "running":
+        st.rerun()
+    st.progress(job.progress, text=f"Simulating {job.trials:,} runs…")
+    render_distribution(job.partial())
+    if st.button("Cancel batch ✋"):
+        get_job_queue().cancel(job_id)
+        st.rerun()
+
+def render_batch(selection, multipliers):
+    trials = st.select_slider("Batch size", options=[10_000, 100_000, 1_000_000], value=100_000)
+    if st.button("Run Batch 🧮"):
+        job = get_job_queue().submit(selection, multipliers, trials, POSTERIOR_PATH)
+        st.session_state.batch_job = job.id
+
+    metrics = get_result_cache().metrics
+    st.caption(f"Result cache: {metrics.hits} hits / {metrics.misses} misses ({metrics.hit_rate*100:.0f}%)")
+
+    job = get_job_queue().get(st.session_state.batch_job) if st.session_state.batch_job else None
+    if job is None:
+        return
+    if job.status == "running":
+        render_batch_progress(job.id)
+    elif job.status == "done":
+        render_distribution(job.partial())
+    elif job.status == "failed":
+        st.error(f"Batch failed: {job.error}")
+    else:
+        st.caption("Batch cancelled.")
 
 # ================================================
-# LAYOUT 50/50
+# PROTOCOL SUGGESTION
 # ================================================
-canvas_col, toolbox_col = st.columns([1, 1])
+def render_optimizer(selection):
+    with st.expander("💡 Suggest Best Protocol"):
+        max_tools = st.slider("Maximum interventions", 1, len(CATALOG.tools), 4)
+        exclude = st.multiselect(
+            "Exclude", [t.id for t in CATALOG.tools if t.id not in selection],
+            default=["Astrocytes"] if "Astrocytes" not in selection else [],
+        )
+        if st.button("Suggest best protocol"):
+            posterior = get_posterior()
+            best, score = suggest(
+                CATALOG,
+                centers=posterior.mean_centers() if posterior is not None else None,
+                max_tools=max_tools, exclude=exclude, require=selection,
+            )
+            if best is None:
+                st.warning("No protocol fits these constraints with your current tools.")
+            else:
+                labels = ", ".join(t.label for t in CATALOG.tools if t.id in best) or "No treatment"
+                st.info(f"**{labels}** — expected success **{score*100:.1f}%**")
 
+# ================================================
+# LAYOUT
+# ================================================
+canvas_col, toolbox_col = st.columns(list(PROFILE.columns))
 
 # ================================================
-# LEFT SIDE — SIMULATION WINDOW
+# LEFT — SIMULATION
 # ================================================
 with canvas_col:
     st.header("🧪 Regeneration Simulation")
+
     canvas = st.empty()
+    if PROFILE.canvas == "server":
+        play_if_queued(canvas)
+        canvas.image(render_canvas(), width=CANVAS_WIDTH)
 
-    # STARTUP VIEW
-    if st.session_state.last_outcome is None:
-        canvas.image(render_canvas(), width=1100)
+    selection = selection_from_state(CATALOG, st.session_state)
+    config = selection_mask(CATALOG, selection)
+
+    multipliers = dose_multipliers(CATALOG, {k: v for k, v in st.session_state.doses.items() if k in selection})
+    doses_key = dose_key(CATALOG, selection, st.session_state.doses)
 
-    # LAST RESULT
-    else:
-        if st.session_state.last_outcome:
-            canvas.image(gif("axon_success_gif.png"), width=1100)
-        else:
-            canvas.image(gif("axon_failure_gif.png"), width=1100)
-
-    # ONE-TIME TOOL ANIMATION
-    if st.session_state.play_anim_once and st.session_state.temp_animation:
-        canvas.image(st.session_state.temp_animation, width=1100)
-        time.sleep(1.0)
-        st.session_state.play_anim_once = False
-        st.session_state.temp_animation = None
-        canvas.image(render_canvas(), width=1100)
-
-    # RUN SIMULATION BUTTON
     if st.button("Run Simulation 🚀"):
-        success = 0.05
-        if st.session_state.intrinsic:
-            success += random.uniform(0.25, 0.45)
-        if st.session_state.support:
-            success += random.uniform(0.20, 0.40)
-        if st.session_state.scaffold:
-            success += random.uniform(0.10, 0.25)
-        if st.session_state.molecules:
-            success += random.uniform(0.05, 0.15)
-
-        success = min(success, 0.95)
+        success, result = run_trial(CATALOG, selection, posterior=get_posterior(), multipliers=multipliers)
+        get_stats_store().record(config, success, result, doses_key)
+        get_run_log().append(st.session_state.session_id, config, success, result, doses_key)
+
         st.session_state.last_success = success
         st.markdown(f"### Success Probability: **{success*100:.1f}%**")
 
-        outcome = random.random() < success
-        st.session_state.last_outcome = outcome
+        st.session_state.last_outcome = result
+        st.session_state.last_run = uuid.uuid4().hex[:16]
+        st.session_state.last_guided = bool(st.session_state.get("scaffold"))
+        if PROFILE.outcome_banner:
+            if result:
+                st.success("Regeneration Successful 🎉")
+            else:
+                st.error("Regeneration Failed ❌")
 
-        if outcome:
-            st.success("Regeneration Successful 🎉")
-            canvas.image(gif("axon_success_gif.png"), width=1100)
-        else:
-            st.error("Regeneration Failed ❌")
-            canvas.image(gif("axon_failure_gif.png"), width=1100)
+        if PROFILE.canvas == "server":
+            canvas.image(render_canvas(), width=CANVAS_WIDTH)
 
-    # RESET BUTTON (Option A)
     if st.button("Reset ❌"):
+        session_id = st.session_state.session_id
         st.session_state.clear()
-        st.stop()
+        st.session_state.session_id = session_id
+        st.rerun()
+
+    if PROFILE.canvas != "server":
+        render_client_canvas(canvas)
+
+    run = outcome_layer() if st.session_state.last_outcome is not None else None
+    if run is not None:
+        drawn = run.stats()
+        st.caption(f"{drawn['crossed']} of {drawn['sprouted']} sprouting axons crossed the gap.")
 
+    render_optimizer(selection)
+    render_distribution(get_stats_store().get(config, doses_key))
+    render_report_download(selection, config, doses_key)
+
+    with st.expander("🧮 Batch Simulation"):
+        render_batch(selection, multipliers)
 
 # ================================================
-# RIGHT SIDE — TOOLBOX
+# RIGHT — TOOLBOX
 # ================================================
+ICON_SIZE = PROFILE.icon_size
+
+def play_queued():
+    if PROFILE.animation == "inline" and PROFILE.canvas == "server":
+        # Older layouts play straight into the canvas and carry on with this run.
+        play_if_queued(canvas)
+    else:
+        st.rerun()
+
+def use_tool(tool):
+    cat = CATALOG.category_by_key[tool.category]
+    old_layers = canvas_layers()
+    if cat.exclusive:
+        st.session_state[cat.key] = tool.id
+        if cat.overlay_slot:
+            st.session_state[cat.overlay_slot] = tool.overlay
+    else:
+        st.session_state[cat.key].add(tool.id)
+    if tool.transition:
+        queue_transition(old_layers)
+    else:
+        queue_animation(tool.animation)
+    play_queued()
+
+def tool_locked(tool):
+    cat = CATALOG.category_by_key[tool.category]
+    chosen = st.session_state[cat.key]
+    return cat.exclusive and chosen is not None and chosen != tool.id
+
+def store_dose(tool_id):
+    st.session_state.doses[tool_id] = (st.session_state[f"dose_{tool_id}"], st.session_state[f"day_{tool_id}"])
+
+def render_dose_controls(tool):
+    curve = dose_curves(CATALOG)[tool.id]
+    dose, day = st.session_state.doses.setdefault(tool.id, (curve.default_dose, curve.default_day))
+    options = [round(float(d), 2) for d in curve.doses]
+    st.select_slider(
+        f"Dose ({curve.unit})", options=options,
+        value=min(options, key=lambda d: abs(d - dose)),
+        key=f"dose_{tool.id}", on_change=store_dose, args=(tool.id,),
+    )
+    st.slider(
+        "Day given", int(curve.days[0]), int(curve.days[-1]), int(day),
+        key=f"day_{tool.id}", on_change=store_dose, args=(tool.id,),
+    )
+    st.caption(f"Effect × {curve.multiplier(dose, day):.2f}")
+
+def render_tool(tool):
+    sprite = SPRITES and sprite_html(SPRITES, tool.icon)
+    if sprite:
+        st.markdown(sprite, unsafe_allow_html=True)
+    else:
+        st.image(tool.icon, width=ICON_SIZE)
+    if st.button(f"Use {tool.label}", disabled=tool_locked(tool)):
+        use_tool(tool)
+    if tool.pk and tool.id in selection:
+        render_dose_controls(tool)
+
 with toolbox_col:
     st.markdown('<div class="toolbox-panel">', unsafe_allow_html=True)
     st.header("🧰 Toolbox")
-    ICON_SIZE = 160
-
-    # --------------------------------------------
-    # INTRINSIC
-    # --------------------------------------------
-    st.subheader("Intrinsic Growth Programs")
-
-    ig1, ig2 = st.columns(2)
-    with ig1:
-        st.image(icon("KLF7.png"), width=ICON_SIZE)
-        if st.button("Use KLF7"):
-            st.session_state.intrinsic.add("KLF7")
-            st.session_state.temp_animation = gif("AAV_gif.png")
-            st.session_state.play_anim_once = True
-
-    with ig2:
-        st.image(icon("GAP-43_BASP1.png"), width=ICON_SIZE)
-        if st.button("Use GAP-43/BASP1"):
-            st.session_state.intrinsic.add("GAP43")
-            st.session_state.temp_animation = gif("AAV_gif.png")
-            st.session_state.play_anim_once = True
-
-    ig3, ig4 = st.columns(2)
-    with ig3:
-        st.image(icon("CAMP_Elevation.png"), width=ICON_SIZE)
-        if st.button("Use cAMP"):
-            st.session_state.intrinsic.add("cAMP")
-            st.session_state.temp_animation = gif("AAV_gif.png")
-            st.session_state.play_anim_once = True
-
-    with ig4:
-        st.image(icon("ATF3CREB.png"), width=ICON_SIZE)
-        if st.button("Use ATF3/CREB"):
-            st.session_state.intrinsic.add("CREB")
-            st.session_state.temp_animation = gif("AAV_gif.png")
-            st.session_state.play_anim_once = True
-
-    st.markdown("---")
-
-    # --------------------------------------------
-    # SUPPORT CELLS (exclusive)
-    # --------------------------------------------
-    st.subheader("Support Cells")
-
-    disabled_support = st.session_state.support is not None
-
-    sc1, sc2 = st.columns(2)
-    with sc1:
-        st.image(icon("SchwannCell.png"), width=ICON_SIZE)
-        if st.button("Use Schwann", disabled=disabled_support and st.session_state.support!="Schwann"):
-            st.session_state.support = "Schwann"
-            st.session_state.cell_overlay = "gifs/schwann_cell_overlay.png"
-            st.session_state.temp_animation = gif("schwann_cell_gif.png")
-            st.session_state.play_anim_once = True
-
-    with sc2:
-        st.image(icon("SchwannLikeCell.png"), width=ICON_SIZE)
-        if st.button("Use Schwann-like", disabled=disabled_support and st.session_state.support!="SchwannLike"):
-            st.session_state.support = "SchwannLike"
-            st.session_state.cell_overlay = "gifs/schwann_like_cells_overlay.png"
-            st.session_state.temp_animation = gif("schwann_like_cell_gif.png")
-            st.session_state.play_anim_once = True
-
-    st.markdown("---")
-
-    # --------------------------------------------
-    # SCAFFOLDS (exclusive)
-    # --------------------------------------------
-    st.subheader("Physical Scaffolds")
-
-    disabled_scaffold = st.session_state.scaffold is not None
-
-    pf1, pf2 = st.columns(2)
-    with pf1:
-        st.image(icon("aligned_fibers.png"), width=ICON_SIZE)
-        if st.button("Use Aligned Fibers", disabled=disabled_scaffold and st.session_state.scaffold!="Aligned"):
-            st.session_state.scaffold = "Aligned"
-            st.session_state.scaffold_overlay = "gifs/aligned_fibers_overlay.png"
-            st.session_state.temp_animation = gif("scaffold_fadein_gif.png")
-            st.session_state.play_anim_once = True
-
-    with pf2:
-        st.image(icon("laminin.png"), width=ICON_SIZE)
-        if st.button("Use Laminin", disabled=disabled_scaffold and st.session_state.scaffold!="Laminin"):
-            st.session_state.scaffold = "Laminin"
-            st.session_state.scaffold_overlay = "gifs/scaffold_fadein_gif.png"
-            st.session_state.temp_animation = gif("scaffold_fadein_gif.png")
-            st.session_state.play_anim_once = True
-
-    pf3, pf4 = st.columns(2)
-    with pf3:
-        st.image(icon("hydrogel_tube.png"), width=ICON_SIZE)
-        if st.button("Use Hydrogel", disabled=disabled_scaffold and st.session_state.scaffold!="Hydrogel"):
-            st.session_state.scaffold = "Hydrogel"
-            st.session_state.scaffold_overlay = "gifs/hydrogel_overlay.png"
-            st.session_state.temp_animation = gif("scaffold_fadein_gif.png")
-            st.session_state.play_anim_once = True
-
-    with pf4:
-        st.image(icon("BDNF_gradient.png"), width=ICON_SIZE)
-        if st.button("Use BDNF", disabled=disabled_scaffold and st.session_state.scaffold!="BDNF"):
-            st.session_state.scaffold = "BDNF"
-            st.session_state.scaffold_overlay = "gifs/scaffold_fadein_gif.png"
-            st.session_state.temp_animation = gif("scaffold_fadein_gif.png")
-            st.session_state.play_anim_once = True
-
-    st.markdown("---")
-
-    # --------------------------------------------
-    # SMALL MOLECULES
-    # --------------------------------------------
-    st.subheader("Small Molecules")
-
-    sm1, sm2 = st.columns(2)
-    with sm1:
-        st.image(icon("M1.png"), width=ICON_SIZE)
-        if st.button("Use M1"):
-            st.session_state.molecules.add("M1")
-            st.session_state.temp_animation = gif("small_molecule_diffusion_gif.png")
-            st.session_state.play_anim_once = True
-
-    with sm2:
-        st.image(icon("SB216763.png"), width=ICON_SIZE)
-        if st.button("Use SB216763"):
-            st.session_state.molecules.add("SB216763")
-            st.session_state.temp_animation = gif("small_molecule_diffusion_gif.png")
-            st.session_state.play_anim_once = True
-
-    sm3, sm4 = st.columns(2)
-    with sm3:
-        st.image(icon("7,8-DHF.png"), width=ICON_SIZE)
-        if st.button("Use 7,8-DHF"):
-            st.session_state.molecules.add("7,8-DHF")
-            st.session_state.temp_animation = gif("small_molecule_diffusion_gif.png")
-            st.session_state.play_anim_once = True
-
-    with sm4:
-        st.image(icon("Mexiletine.png"), width=ICON_SIZE)
-        if st.button("Use Mexiletine"):
-            st.session_state.molecules.add("Mexiletine")
-            st.session_state.temp_animation = gif("small_molecule_diffusion_gif.png")
-            st.session_state.play_anim_once = True
+
+    def render_category(cat):
+        tools = [t for t in CATALOG.tools_by_category[cat.key] if t.id not in PROFILE.hide_tools]
+        for i in range(0, len(tools), 2):
+            for col, tool in zip(st.columns(2), tools[i:i + 2]):
+                with col:
+                    render_tool(tool)
+
+    if PROFILE.toolbox == "tabs":
+        # Selecting a tab reruns, so only the open tab's tools are built and sent.
+        tabs = st.tabs([cat.label for cat in CATALOG.categories], key="toolbox_tab", on_change="rerun")
+        for tab, cat in zip(tabs, CATALOG.categories):
+            if tab.open:
+                with tab:
+                    render_category(cat)
+    else:
+        for i, cat in enumerate(CATALOG.categories):
+            if i:
+                st.markdown("---")
+            st.subheader(cat.label)
+            render_category(cat)
 
     st.markdown("</div>", unsafe_allow_html=True)
+
+persist_session()
+MONITOR.end(st.session_state.session_id, st.session_state)
+
+if MONITOR.tracing:
+    with st.sidebar.expander("🧠 Memory"):
+        report = MONITOR.report()
+        st.metric("Process RSS", f"{report['rss'] / 2**20:.0f} MiB")
+        st.caption(
+            f"{report['sessions']} sessions · state {report['state_bytes_total'] / 1024:.0f} KiB total · "
+            f"largest rerun peak {report['rerun_peak_max'] / 2**20:.1f} MiB · canvas level {report['level']}"
+        )
+        for stat in MONITOR.top_allocations(5):
+            st.text(str(stat))
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+from functools import lru_cache
+
+from PIL import Image
+
+from catalog import ROOT, asset, load_catalog
+
+# ================================================
+# SHARED ASSET LAYER
+# Decoded layers are kept once per process and shared by every session and
+# profile. Cached images must never be mutated; compose onto a copy.
+# ================================================
+LAYER_CACHE_SIZE = 64
+MANIFEST_PATH = os.path.join(ROOT, "assets_manifest.json")
+BUILD_DIR = os.path.join(ROOT, "build")
+# Crops snap outward to this grid so reduced sprites line up with reduced full layers.
+SPRITE_ALIGN = 8
+
+def load_rgba(path):
+    return Image.open(path).convert("RGBA")
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def load_layer(path, reduce=1):
+    img = load_rgba(path)
+    return img.reduce(reduce) if reduce > 1 else img
+
+@lru_cache(maxsize=None)
+def layer_size(path):
+    # Reads the header only; no pixel data is decoded.
+    with Image.open(path) as img:
+        return img.size
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def load_sprite(path, reduce=1):
+    # An overlay cut down to its opaque box, and where that box sits on the canvas.
+    info = layer_info(path)
+    box = sprite_box(info)
+    crop = info.get("crop") and asset(info["crop"])
+    img = load_rgba(crop) if crop and os.path.exists(crop) else load_rgba(path).crop(box)
+    if reduce > 1:
+        img = img.reduce(reduce)
+    return img, (box[0] // reduce, box[1] // reduce)
+
+def compose(base_path, overlays, reduce=1):
+    canvas = load_layer(base_path, reduce).copy()
+    for path in overlays:
+        if path:
+            sprite, offset = load_sprite(path, reduce)
+            canvas.alpha_composite(sprite, dest=offset)
+    return canvas
+
+def clear_layers():
+    load_layer.cache_clear()
+    load_sprite.cache_clear()
+
+# ================================================
+# ASSET MANIFEST
+# Built once with `python assets.py` and committed next to the images: the
+# size and opaque bounding box of every layer, plus a copy of each mostly
+# transparent overlay cropped to that box under build/. A missing or stale
+# entry is measured, and cropped in memory, on first use instead.
+# ================================================
+def measure(path):
+    img = load_rgba(path)
+    return {"bytes": os.path.getsize(path), "size": list(img.size), "bbox": list(img.getchannel("A").getbbox() or (0, 0, 0, 0))}
+
+def sprite_box(info):
+    (w, h), (x0, y0, x1, y1) = info["size"], info["bbox"]
+    a = SPRITE_ALIGN
+    return x0 // a * a, y0 // a * a, min(-(-x1 // a) * a, w), min(-(-y1 // a) * a, h)
+
+def write_crop(path, entry, build_dir=BUILD_DIR):
+    box = sprite_box(entry)
+    if box == (0, 0, *entry["size"]):
+        return entry
+    out = os.path.join(build_dir, "overlays", os.path.basename(path))
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    load_rgba(path).crop(box).save(out, optimize=True)
+    return {**entry, "crop": os.path.relpath(out, ROOT)}
+
+def catalog_layers(catalog, extra=()):
+    paths = {catalog.base_image, *(asset(p) for p in extra)}
+    for tool in catalog.tools:
+        paths.update(tool.animation)
+        if tool.overlay:
+            paths.add(tool.overlay)
+    return sorted(paths)
+
+def build_manifest(paths, out=MANIFEST_PATH, build_dir=BUILD_DIR):
+    manifest = {os.path.relpath(p, ROOT): write_crop(p, measure(p), build_dir) for p in paths}
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+@lru_cache(maxsize=None)
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+@lru_cache(maxsize=None)
+def layer_info(path):
+    entry = load_manifest().get(os.path.relpath(path, ROOT))
+    if entry is None or entry["bytes"] != os.path.getsize(path):
+        entry = measure(path)
+    return entry
+
+def layer_bbox(path, reduce=1):
+    x0, y0, x1, y1 = layer_info(path)["bbox"]
+    return x0 // reduce, y0 // reduce, -(-x1 // reduce), -(-y1 // reduce)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure canvas layers into the asset manifest.")
+    parser.add_argument("--out", default=MANIFEST_PATH)
+    parser.add_argument("--build-dir", default=BUILD_DIR)
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    paths = catalog_layers(catalog, ["gifs/axon_success_gif.png", "gifs/axon_failure_gif.png"])
+    manifest = build_manifest(paths, args.out, args.build_dir)
+    for name, entry in manifest.items():
+        x0, y0, x1, y1 = entry["bbox"]
+        coverage = (x1 - x0) * (y1 - y0) / (entry["size"][0] * entry["size"][1])
+        print(f"  {name:<40} bbox {entry['bbox']} ({coverage*100:.0f}% of canvas)" + (" cropped" if "crop" in entry else ""))
+    print(f"{len(manifest)} layers -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from functools import lru_cache
+
+from catalog import CATALOG_PATH, DATA_DIR
+
+# ================================================
+# SHARED RESULT CACHE
+# Content-addressed: a result is keyed by its normalised configuration, the
+# model version (catalog + posterior contents) and the seed, so anything that
+# would change the answer changes the key. Backends are interchangeable.
+# ================================================
+CACHE_PATH = os.path.join(DATA_DIR, "axon_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+@lru_cache(maxsize=32)
+def _file_digest(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return _digest(f.read())
+
+def model_version(catalog_path=CATALOG_PATH, posterior_path=None):
+    parts = []
+    for path in (catalog_path, posterior_path):
+        if path and os.path.exists(path):
+            st = os.stat(path)
+            parts.append(_file_digest(path, st.st_mtime_ns, st.st_size))
+    return _digest(":".join(parts).encode())
+
+def result_key(kind, config, version, seed=0):
+    payload = json.dumps({"kind": kind, "config": config, "version": version, "seed": seed},
+                         sort_keys=True, separators=(",", ":"))
+    return f"{kind}:{_digest(payload.encode())}"
+
+# ================================================
+# METRICS
+# ================================================
+class CacheMetrics:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hit_rate}
+
+# ================================================
+# BACKENDS
+# ================================================
+class MemoryCache:
+    def __init__(self, max_entries=1024, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.metrics = CacheMetrics()
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    self._drop(key)
+                self.metrics.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.metrics.hits += 1
+            return pickle.loads(entry[0])
+
+    def set(self, key, value, ttl=None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (blob, time.time() + (ttl or self.ttl))
+            self.bytes += len(blob)
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._drop(next(iter(self.entries)))
+                self.metrics.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key):
+        blob, _ = self.entries.pop(key)
+        self.bytes -= len(blob)
+
+    def __len__(self):
+        return len(self.entries)
+
+class SQLiteCache:
+    # Shared by every Streamlit worker process on the host.
+    def __init__(self, path=CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.metrics = CacheMetrics()
+        with closing(self._connect()) as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, value BLOB, size INTEGER, expires REAL, accessed REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def get(self, key):
+        now = time.time()
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT value FROM results WHERE key = ? AND expires >= ?", (key, now)).fetchone()
+            if row is None:
+                self.metrics.misses += 1
+                return None
+            db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        self.metrics.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                       (key, blob, len(blob), now + (ttl or self.ttl), now))
+            db.execute("DELETE FROM results WHERE expires < ?", (now,))
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = db.execute("SELECT key, size FROM results ORDER BY accessed LIMIT 1").fetchone()
+                if oldest is None or oldest[0] == key:
+                    break
+                db.execute("DELETE FROM results WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                self.metrics.evictions += 1
+            db.execute("COMMIT")
+
+    def __len__(self):
+        with closing(self._connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+class RedisCache:
+    # Any Redis-protocol server (Redis, Valkey, KeyDB, ...). Needs the optional `redis` package.
+    def __init__(self, url="redis://localhost:6379/0", ttl=DEFAULT_TTL, prefix="axon:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisCache needs the `redis` package: pip install redis") from e
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.metrics = CacheMetrics()
+
+    def get(self, key):
+        blob = self.client.get(self.prefix + key)
+        if blob is None:
+            self.metrics.misses += 1
+            return None
+        self.metrics.hits += 1
+        return pickle.loads(blob)
+
+    def set(self, key, value, ttl=None):
+        # Size limits are left to the server's maxmemory / eviction policy.
+        self.client.set(self.prefix + key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                        ex=int(ttl or self.ttl))
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(self.prefix + "*"))
+
+def open_cache(spec=None):
+    # "memory", "sqlite" / "sqlite:/path/to.db" or "redis://host:port/db"; AXON_CACHE overrides.
+    spec = spec or os.environ.get("AXON_CACHE", "sqlite")
+    if spec == "memory":
+        return MemoryCache()
+    if spec == "sqlite" or spec.startswith("sqlite:"):
+        return SQLiteCache(spec.partition(":")[2] or CACHE_PATH)
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(spec)
+    raise ValueError(f"unknown cache backend: {spec!r}")
@@ -0,0 +1,148 @@
+import argparse
+import csv
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from catalog import ROOT, load_catalog
+from engine import active_effects
+
+# ================================================
+# CALIBRATION
+# Fits the effect centres (and baseline) in treatments.json to observed
+# outcomes. The CSV needs a `treatments` column of ';'-separated tool ids
+# (empty for untreated controls) and either `successes` + `trials`
+# or a 0/1 `outcome` column.
+# ================================================
+POSTERIOR_PATH = os.path.join(ROOT, "posterior.npz")
+
+def param_names(catalog):
+    return ("baseline",) + tuple(catalog.effect_params)
+
+def prior_centers(catalog):
+    return np.array([catalog.model["baseline"]] + [(lo + hi) / 2 for lo, hi in catalog.effect_params.values()])
+
+def prior_scales(catalog):
+    return np.array([0.05] + [max(hi - lo, 0.1) for lo, hi in catalog.effect_params.values()])
+
+# ================================================
+# DATA
+# ================================================
+def read_outcomes(path):
+    counts = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            selection = frozenset(t.strip() for t in (row.get("treatments") or "").split(";") if t.strip())
+            if "outcome" in row and row["outcome"] not in (None, ""):
+                k, n = int(row["outcome"]), 1
+            else:
+                k, n = int(row["successes"]), int(row["trials"])
+            total = counts.setdefault(selection, [0, 0])
+            total[0] += k
+            total[1] += n
+    return counts
+
+def design_matrix(catalog, counts):
+    # Identical configurations are collapsed into binomial rows so the likelihood cost
+    # scales with distinct configurations, not with the number of animals.
+    names = param_names(catalog)
+    column = {name: i for i, name in enumerate(names)}
+    X = np.zeros((len(counts), len(names)))
+    k = np.zeros(len(counts))
+    n = np.zeros(len(counts))
+    for r, (selection, (successes, trials)) in enumerate(counts.items()):
+        unknown = selection - set(catalog.tool_by_id)
+        if unknown:
+            raise ValueError(f"unknown treatments in data: {sorted(unknown)}")
+        X[r, column["baseline"]] = 1.0
+        for tool in active_effects(catalog, selection):
+            X[r, column[tool.param]] = 1.0
+        k[r], n[r] = successes, trials
+    return X, k, n
+
+# ================================================
+# LIKELIHOOD (vectorised over walkers)
+# ================================================
+def log_posterior(theta, X, k, n, mu, sigma, floor, ceiling):
+    p = np.clip(theta @ X.T, floor, ceiling)
+    loglik = (k * np.log(p) + (n - k) * np.log1p(-p)).sum(axis=1)
+    logprior = -0.5 * (((theta - mu) / sigma) ** 2).sum(axis=1)
+    return loglik + logprior
+
+# ================================================
+# SAMPLER — adaptive random-walk Metropolis, many walkers per chain
+# ================================================
+def run_chain(args):
+    seed, X, k, n, mu, sigma, floor, ceiling, walkers, burn, steps, thin = args
+    rng = np.random.default_rng(seed)
+    dim = len(mu)
+
+    theta = mu + 0.1 * sigma * rng.standard_normal((walkers, dim))
+    logp = log_posterior(theta, X, k, n, mu, sigma, floor, ceiling)
+    scale = 2.38 / np.sqrt(dim) * 0.1 * sigma
+    kept, accepted = [], 0
+
+    for step in range(burn + steps):
+        proposal = theta + scale * rng.standard_normal((walkers, dim))
+        logp_new = log_posterior(proposal, X, k, n, mu, sigma, floor, ceiling)
+        accept = np.log(rng.random(walkers)) < logp_new - logp
+        theta[accept] = proposal[accept]
+        logp[accept] = logp_new[accept]
+
+        if step < burn:
+            # Nudge the step size towards the usual ~0.234 acceptance rate.
+            scale *= np.exp(accept.mean() - 0.234)
+        else:
+            accepted += accept.sum()
+            if (step - burn) % thin == 0:
+                kept.append(theta.copy())
+
+    return np.concatenate(kept), accepted / (walkers * steps)
+
+def calibrate(data_path, chains=4, walkers=64, burn=1000, steps=2000, thin=10, seed=0, catalog=None):
+    catalog = catalog or load_catalog()
+    X, k, n = design_matrix(catalog, read_outcomes(data_path))
+    mu, sigma = prior_centers(catalog), prior_scales(catalog)
+    floor, ceiling = catalog.model["floor"], catalog.model["ceiling"]
+
+    jobs = [(seed + c, X, k, n, mu, sigma, floor, ceiling, walkers, burn, steps, thin) for c in range(chains)]
+    with Pool(min(chains, os.cpu_count() or 1)) as pool:
+        results = pool.map(run_chain, jobs)
+
+    samples = np.concatenate([s for s, _ in results]).astype(np.float32)
+    acceptance = float(np.mean([a for _, a in results]))
+    return param_names(catalog), samples, acceptance
+
+def save_posterior(path, names, samples):
+    np.savez_compressed(path, names=np.array(names), samples=samples)
+
+# ================================================
+# CLI
+# ================================================
+def main():
+    parser = argparse.ArgumentParser(description="Fit treatment effects to experimental outcomes.")
+    parser.add_argument("data", help="CSV of experimental outcomes")
+    parser.add_argument("--out", default=POSTERIOR_PATH)
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--walkers", type=int, default=64)
+    parser.add_argument("--burn", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--thin", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    names, samples, acceptance = calibrate(
+        args.data, args.chains, args.walkers, args.burn, args.steps, args.thin, args.seed
+    )
+    save_posterior(args.out, names, samples)
+
+    print(f"{len(samples)} posterior samples in {time.perf_counter() - start:.1f}s "
+          f"(acceptance {acceptance:.2f}) -> {args.out}")
+    for name, mean, sd in zip(names, samples.mean(axis=0), samples.std(axis=0)):
+        print(f"  {name:<12} {mean:+.3f} ± {sd:.3f}")
+
+if __name__ == "__main__":
+    main()
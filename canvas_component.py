@@ -0,0 +1,126 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import streamlit.components.v1 as components
+from PIL import Image
+
+from assets import catalog_layers, layer_size
+from catalog import ROOT, asset
+from sequencer import FADE_SECONDS, HOLD_SECONDS, STILL_SECONDS
+
+# ================================================
+# CLIENT-SIDE CANVAS
+# The browser stacks the base, overlay and outcome layers itself. Each layer
+# is published once under a content-addressed name inside the component's
+# directory (the component server refuses symlinks out of it), so browsers
+# cache it for good; a rerun only sends the list of visible layer URLs.
+# Tool animations are published as the frame pool fits and encodes them,
+# not as the full-size source stills.
+# ================================================
+FRONTEND_DIR = os.path.join(ROOT, "frontend", "canvas")
+LAYER_DIR = os.path.join(FRONTEND_DIR, "layers")
+
+_component = components.declare_component("layered_canvas", path=FRONTEND_DIR)
+
+MAX_FRAME_URLS = 256
+
+def _publish(data, ext):
+    name = hashlib.blake2b(data, digest_size=10).hexdigest() + ext
+    target = os.path.join(LAYER_DIR, name)
+    if not os.path.exists(target):
+        os.makedirs(LAYER_DIR, exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+    return f"layers/{name}"
+
+@lru_cache(maxsize=None)
+def layer_url(path):
+    path = asset(path)
+    with open(path, "rb") as f:
+        return _publish(f.read(), os.path.splitext(path)[1])
+
+@lru_cache(maxsize=MAX_FRAME_URLS)
+def frame_url(pool, path, reduce=1):
+    # An animation frame cropped and scaled to the canvas, in the pool's (transient) format.
+    data = pool.encoder.encode(Image.fromarray(pool.frame(asset(path), reduce)))
+    return _publish(data, "." + pool.encoder.format)
+
+def publish_layers(catalog, outcome_images=()):
+    return {path: layer_url(path) for path in catalog_layers(catalog, outcome_images)}
+
+def _flash(frames, pool=None, reduce=1):
+    # A tool animation for the browser to play: its frames and how long to hold and fade each.
+    # Without a frame pool the files are sent as they are (a prerendered transition).
+    if not frames:
+        return {"flash": None}
+    hold = STILL_SECONDS if len(frames) == 1 else HOLD_SECONDS
+    urls = [frame_url(pool, p, reduce) if pool else layer_url(p) for p in frames]
+    return {"flash": urls, "hold_ms": int(hold * 1000), "fade_ms": int(FADE_SECONDS * 1000)}
+
+def _aspect(path):
+    w, h = layer_size(asset(path))
+    return w / h
+
+def _layer_entry(layer):
+    # Image files fill the canvas; drawn layers (outcome.RunLayer) are placed by their box.
+    if isinstance(layer, str):
+        return {"src": layer_url(layer), "box": None}
+    return {"src": layer.url(), "box": list(layer.bbox())}
+
+def layered_canvas(layers, width, flash=None, frame_pool=None, reduce=1, nonce=None, key="canvas"):
+    layers = [p for p in layers if p]
+    # A transition fades only the image layers, so drawn layers stay above it.
+    drawn = [i for i, p in enumerate(layers) if not isinstance(p, str)]
+    return _component(
+        mode="layers",
+        layers=[_layer_entry(p) for p in layers],
+        size=list(layer_size(asset(layers[0]))),
+        width=width if isinstance(width, int) else None,
+        aspect=_aspect(layers[0]),
+        nonce=nonce,
+        **_flash(flash, frame_pool, reduce),
+        flash_below=drawn[0] if drawn and not frame_pool else None,
+        key=key,
+        default=None,
+    )
+
+# ================================================
+# DELTA FRAMES
+# The server owns the pixels and the browser keeps the last frame on a
+# <canvas>. Only the tiles that differ between the frame the browser holds
+# and the new one are sent, each encoded once (in the renderer's format)
+# and cached by the tile renderer. Every message names the frame it applies to; a browser holding
+# anything else (a remounted iframe) asks for a full frame through its
+# component value.
+# ================================================
+def frame_key(layers, reduce):
+    return hashlib.blake2b("|".join(map(str, [*layers, reduce])).encode(), digest_size=8).hexdigest()
+
+def frame_patches(renderer, old_layers, layers, reduce):
+    t = renderer.tile_size
+    return [
+        {"x": ix * t, "y": iy * t, "src": renderer.tile_url(key)}
+        for (ix, iy), key in renderer.changed(old_layers, layers, reduce).items()
+    ]
+
+def delta_canvas(renderer, old, layers, width, reduce=1, flash=None, frame_pool=None, nonce=None, key="canvas"):
+    # old is the (layers, reduce) the browser was last sent, or None for a full frame.
+    layers = [p for p in layers if p]
+    old_layers = list(old[0]) if old and old[1] == reduce else None
+    w, h = layer_size(asset(layers[0]))
+    return _component(
+        mode="frame",
+        key_from=frame_key(old_layers, reduce) if old_layers else None,
+        key_to=frame_key(layers, reduce),
+        size=list(renderer.canvas_size(layers[0], reduce)),
+        patches=frame_patches(renderer, old_layers, layers, reduce) if old_layers != layers else [],
+        width=width if isinstance(width, int) else None,
+        aspect=w / h,
+        nonce=nonce,
+        **_flash(flash, frame_pool, reduce),
+        key=key,
+        default=None,
+    )
@@ -0,0 +1,208 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+# ================================================
+# PATHS
+# ================================================
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.path.join(ROOT, "treatments.json")
+# Where run logs, statistics, caches and sessions are written.
+DATA_DIR = os.environ.get("AXON_DATA_DIR", ROOT)
+
+def asset(path):
+    return path if os.path.isabs(path) else os.path.join(ROOT, path)
+
+# ================================================
+# CATALOG ENTRIES
+# ================================================
+@dataclass(frozen=True)
+class Category:
+    key: str
+    label: str
+    exclusive: bool
+    overlay_slot: str | None
+    effect: tuple
+    pk: MappingProxyType | None
+
+@dataclass(frozen=True)
+class Tool:
+    id: str
+    label: str
+    category: str
+    icon: str
+    animation: tuple
+    transition: str | None
+    overlay: str | None
+    effect: tuple
+    param: str
+    pk: MappingProxyType | None
+    bit: int
+
+@dataclass(frozen=True, eq=False)
+class Catalog:
+    model: MappingProxyType
+    base_image: str
+    overlay_order: tuple
+    categories: tuple
+    tools: tuple
+    category_by_key: MappingProxyType
+    tool_by_id: MappingProxyType
+    tools_by_category: MappingProxyType
+
+    def category_of(self, tool_id):
+        return self.category_by_key[self.tool_by_id[tool_id].category]
+
+    @property
+    def effect_params(self):
+        # Tools with their own effect range get their own parameter; the rest share their category's.
+        params = {}
+        for t in self.tools:
+            params.setdefault(t.param, t.effect)
+        return MappingProxyType(params)
+
+# ================================================
+# LOADING
+# ================================================
+def _effect(raw, where):
+    lo, hi = (float(x) for x in raw)
+    if lo > hi:
+        raise ValueError(f"{where}: effect range [{lo}, {hi}] is inverted")
+    return (lo, hi)
+
+def _pk(cat, tool):
+    # Tools inherit their category's dosing model and may override single constants.
+    if not cat.pk and not tool.get("pk"):
+        return None
+    return MappingProxyType({**(cat.pk or {}), **tool.get("pk", {})})
+
+# A tool's bit is its place in every saved selection mask (statistics, run log,
+# sessions), so it is fixed in treatments.json rather than taken from the order
+# of the list: a bit is never reused for another tool. Masks are int64 in optimizer.py.
+MAX_BITS = 63
+
+# Canvas transitions a tool may play instead of an animation (see transitions.py).
+TRANSITIONS = ("fade",)
+
+def _frames(animation):
+    # A single still or a list of frames played in sequence.
+    if not animation:
+        return ()
+    return tuple(asset(p) for p in ([animation] if isinstance(animation, str) else animation))
+
+def parse_catalog(data):
+    categories = []
+    for c in data["categories"]:
+        categories.append(Category(
+            key=c["key"],
+            label=c["label"],
+            exclusive=bool(c.get("exclusive", False)),
+            overlay_slot=c.get("overlay_slot"),
+            effect=_effect(c["effect"], c["key"]),
+            pk=MappingProxyType(dict(c["pk"])) if c.get("pk") else None,
+        ))
+    category_by_key = {c.key: c for c in categories}
+    if len(category_by_key) != len(categories):
+        raise ValueError("duplicate category key in catalog")
+
+    tools = []
+    for t in data["tools"]:
+        cat = category_by_key.get(t["category"])
+        if cat is None:
+            raise ValueError(f"tool {t['id']!r}: unknown category {t['category']!r}")
+        bit = t.get("bit")
+        if not isinstance(bit, int) or not 0 <= bit < MAX_BITS:
+            raise ValueError(f"tool {t['id']!r}: needs a bit between 0 and {MAX_BITS - 1}")
+        if t.get("overlay") and not cat.overlay_slot:
+            raise ValueError(f"tool {t['id']!r}: category {cat.key!r} has no overlay slot")
+        if t.get("transition") not in (None, *TRANSITIONS):
+            raise ValueError(f"tool {t['id']!r}: unknown transition {t['transition']!r}")
+        tools.append(Tool(
+            id=t["id"],
+            label=t.get("label", t["id"]),
+            category=cat.key,
+            icon=asset(t["icon"]),
+            animation=_frames(t.get("animation")),
+            transition=t.get("transition"),
+            overlay=asset(t["overlay"]) if t.get("overlay") else None,
+            effect=_effect(t["effect"], t["id"]) if "effect" in t else cat.effect,
+            param=t["id"] if "effect" in t else cat.key,
+            pk=_pk(cat, t),
+            bit=bit,
+        ))
+    tool_by_id = {t.id: t for t in tools}
+    if len(tool_by_id) != len(tools):
+        raise ValueError("duplicate tool id in catalog")
+    if len({t.bit for t in tools}) != len(tools):
+        raise ValueError("duplicate tool bit in catalog")
+
+    tools_by_category = {c.key: tuple(t for t in tools if t.category == c.key) for c in categories}
+
+    return Catalog(
+        model=MappingProxyType(dict(data.get("model", {}))),
+        base_image=asset(data["base_image"]),
+        overlay_order=tuple(data.get("overlay_order", [c.overlay_slot for c in categories if c.overlay_slot])),
+        categories=tuple(categories),
+        tools=tuple(tools),
+        category_by_key=MappingProxyType(category_by_key),
+        tool_by_id=MappingProxyType(tool_by_id),
+        tools_by_category=MappingProxyType(tools_by_category),
+    )
+
+@lru_cache(maxsize=None)
+def load_catalog(path=CATALOG_PATH):
+    with open(path, encoding="utf-8") as f:
+        return parse_catalog(json.load(f))
+
+# ================================================
+# SELECTIONS
+# ================================================
+def selection_from_state(catalog, state):
+    selected = []
+    for cat in catalog.categories:
+        value = state.get(cat.key)
+        if cat.exclusive:
+            if value:
+                selected.append(value)
+        else:
+            selected.extend(value or ())
+    return frozenset(selected)
+
+def session_defaults(catalog):
+    defaults = {}
+    for cat in catalog.categories:
+        defaults[cat.key] = None if cat.exclusive else set()
+    for slot in catalog.overlay_order:
+        defaults[slot] = None
+    return defaults
+
+def selection_mask(catalog, selection):
+    mask = 0
+    for tool_id in selection:
+        mask |= 1 << catalog.tool_by_id[tool_id].bit
+    return mask
+
+def selection_from_mask(catalog, mask):
+    return frozenset(t.id for t in catalog.tools if mask >> t.bit & 1)
+
+BITS_SCHEMA = "CREATE TABLE IF NOT EXISTS catalog_bits (bit INTEGER PRIMARY KEY, tool TEXT NOT NULL UNIQUE)"
+
+def catalog_bits(catalog):
+    return {t.bit: t.id for t in catalog.tools}
+
+def check_saved_bits(saved, catalog):
+    # saved: {bit: tool id} recorded alongside masks. A catalog that gives a recorded bit, or a
+    # recorded tool, to something else is refused rather than letting saved rows change meaning.
+    current = catalog_bits(catalog)
+    for bit, tool in saved.items():
+        moved = tool in catalog.tool_by_id and catalog.tool_by_id[tool].bit != bit
+        if moved or current.get(bit, tool) != tool:
+            raise ValueError(f"catalog bit {bit} was saved for {tool!r}; treatments.json must keep it")
+
+def check_bits(db, catalog):
+    # Every database keyed by masks records which tool each bit meant; new tools are added.
+    db.execute(BITS_SCHEMA)
+    check_saved_bits(dict(db.execute("SELECT bit, tool FROM catalog_bits").fetchall()), catalog)
+    db.executemany("INSERT OR IGNORE INTO catalog_bits VALUES (?, ?)", catalog_bits(catalog).items())
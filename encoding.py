@@ -0,0 +1,115 @@
+import argparse
+import base64
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+# ================================================
+# CANVAS ENCODER
+# How server-rendered frames and tiles are encoded before they leave the
+# process. "effort" is the format's own speed/size dial: PNG compress level
+# (0-9), WebP method (0-6), and for JPEG optimized Huffman tables (> 0)
+# and progressive scans (>= 6). WebP at quality 100 is lossless.
+#
+#   AXON_CANVAS_ENCODER=webp:80:0   format[:quality[:effort]] (the default)
+#
+# Benchmark the choices on this machine with `python encoding.py`.
+# ================================================
+FORMATS = ("png", "webp", "jpeg")
+MIME_TYPES = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+DEFAULT_SPEC = "webp:80:0"
+
+_buffers = threading.local()
+
+@dataclass(frozen=True)
+class Encoder:
+    format: str = "png"
+    quality: int = 85
+    effort: int = 6
+    options: dict = field(init=False, repr=False, compare=False, hash=False)
+
+    def __post_init__(self):
+        if self.format not in FORMATS:
+            raise ValueError(f"unknown canvas format: {self.format!r}")
+        if self.format == "png":
+            options = {"format": "PNG", "compress_level": min(max(self.effort, 0), 9)}
+        elif self.format == "webp":
+            options = {"format": "WEBP", "quality": self.quality, "method": min(max(self.effort, 0), 6),
+                       "lossless": self.quality >= 100}
+        else:
+            options = {"format": "JPEG", "quality": self.quality, "optimize": self.effort > 0,
+                       "progressive": self.effort >= 6}
+        object.__setattr__(self, "options", options)
+
+    @classmethod
+    def from_spec(cls, spec=None):
+        spec = spec or os.environ.get("AXON_CANVAS_ENCODER", DEFAULT_SPEC)
+        fmt, *rest = spec.lower().split(":")
+        fmt = "jpeg" if fmt == "jpg" else fmt
+        values = dict(zip(("quality", "effort"), map(int, rest)))
+        return cls(fmt, **values)
+
+    @property
+    def spec(self):
+        return f"{self.format}:{self.quality}:{self.effort}"
+
+    @property
+    def mime_type(self):
+        return MIME_TYPES[self.format]
+
+    def encode(self, img):
+        # One output buffer per thread, rewound rather than reallocated for every frame.
+        buf = getattr(_buffers, "buf", None)
+        if buf is None:
+            buf = _buffers.buf = io.BytesIO()
+        buf.seek(0)
+        buf.truncate()
+        if self.format == "jpeg" and img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(buf, **self.options)
+        return buf.getvalue()
+
+    def data_url(self, data):
+        return f"data:{self.mime_type};base64,{base64.b64encode(data).decode()}"
+
+# ================================================
+# BENCHMARK
+# ================================================
+def benchmark(img, encoders, repeat=10):
+    results = []
+    for enc in encoders:
+        enc.encode(img)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            data = enc.encode(img)
+        results.append((enc, (time.perf_counter() - start) / repeat, len(data)))
+    return results
+
+def main():
+    from assets import compose
+    from catalog import load_catalog
+
+    parser = argparse.ArgumentParser(description="Time canvas encoders on a typical frame and tile.")
+    parser.add_argument("specs", nargs="*", default=[
+        "png:85:1", "png:85:6", "png:85:9", "webp:75:0", "webp:85:4", "webp:85:6", "webp:100:4",
+        "jpeg:80:0", "jpeg:90:1", "jpeg:90:6",
+    ])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    tools = catalog.tool_by_id
+    frame = compose(catalog.base_image, [tools["Schwann"].overlay, tools["Laminin"].overlay])
+    tile = frame.crop((384, 384, 512, 512))
+    encoders = [Encoder.from_spec(s) for s in args.specs]
+
+    for name, img in (("frame 1024x1024", frame), ("tile 128x128", tile)):
+        print(name)
+        print(f"  {'encoder':<12}{'ms':>9}{'KiB':>9}")
+        for enc, seconds, size in benchmark(img, encoders, args.repeat):
+            print(f"  {enc.spec:<12}{seconds * 1000:>9.2f}{size / 1024:>9.1f}")
+
+if __name__ == "__main__":
+    main()
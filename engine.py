@@ -0,0 +1,85 @@
+import os
+import random
+from dataclasses import dataclass
+
+import numpy as np
+
+# ================================================
+# TREATMENT MODEL
+# ================================================
+def active_effects(catalog, selection, multipliers=None):
+    # Each category contributes once; with several tools picked, the strongest range wins.
+    multipliers = multipliers or {}
+    active = []
+    for cat in catalog.categories:
+        picked = [t for t in catalog.tools_by_category[cat.key] if t.id in selection]
+        if picked:
+            active.append(max(picked, key=lambda t: (t.effect[0] + t.effect[1]) * multipliers.get(t.id, 1.0)))
+    return active
+
+def effect_ranges(catalog, selection, centers=None, multipliers=None):
+    multipliers = multipliers or {}
+    ranges = []
+    for tool in active_effects(catalog, selection, multipliers):
+        lo, hi = tool.effect
+        if centers is not None and tool.param in centers:
+            shift = centers[tool.param] - (lo + hi) / 2
+            lo, hi = lo + shift, hi + shift
+        scale = multipliers.get(tool.id, 1.0)
+        ranges.append((lo * scale, hi * scale))
+    return ranges
+
+def default_centers(catalog):
+    centers = {"baseline": catalog.model["baseline"]}
+    for param, (lo, hi) in catalog.effect_params.items():
+        centers[param] = (lo + hi) / 2
+    return centers
+
+def clamp(catalog, p):
+    return max(min(p, catalog.model["ceiling"]), catalog.model["floor"])
+
+def success_probability(catalog, selection, rng=random, posterior=None, multipliers=None):
+    centers = posterior.draw(rng) if posterior is not None else None
+    p = centers["baseline"] if centers else catalog.model["baseline"]
+    for lo, hi in effect_ranges(catalog, selection, centers, multipliers):
+        p += rng.uniform(lo, hi)
+    return clamp(catalog, p)
+
+def run_trial(catalog, selection, rng=random, posterior=None, multipliers=None):
+    p = success_probability(catalog, selection, rng, posterior, multipliers)
+    return p, rng.random() < p
+
+def simulate_batch(catalog, selection, trials, rng, posterior=None, multipliers=None):
+    # Vectorised run_trial: rng is a numpy Generator, returns (probabilities, outcomes).
+    multipliers = multipliers or {}
+    rows = posterior.samples[rng.integers(len(posterior.samples), size=trials)] if posterior is not None else None
+    column = {name: i for i, name in enumerate(posterior.names)} if posterior is not None else {}
+
+    p = rows[:, column["baseline"]].astype(float) if rows is not None else np.full(trials, catalog.model["baseline"])
+    for tool in active_effects(catalog, selection, multipliers):
+        lo, hi = tool.effect
+        shift = rows[:, column[tool.param]] - (lo + hi) / 2 if tool.param in column else 0.0
+        p += (lo + shift + (hi - lo) * rng.random(trials)) * multipliers.get(tool.id, 1.0)
+    p = np.clip(p, catalog.model["floor"], catalog.model["ceiling"])
+    return p, rng.random(trials) < p
+
+# ================================================
+# CALIBRATED POSTERIOR
+# ================================================
+@dataclass(frozen=True)
+class Posterior:
+    names: tuple
+    samples: np.ndarray
+
+    def draw(self, rng=random):
+        row = self.samples[rng.randrange(len(self.samples))]
+        return dict(zip(self.names, row.tolist()))
+
+    def mean_centers(self):
+        return dict(zip(self.names, self.samples.mean(axis=0).tolist()))
+
+def load_posterior(path):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return Posterior(names=tuple(data["names"].tolist()), samples=data["samples"])
@@ -0,0 +1,226 @@
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from importlib.machinery import ModuleSpec
+
+import numpy as np
+
+from cache import model_version, result_key
+from catalog import load_catalog
+from engine import load_posterior, simulate_batch
+from stats import RunningStats
+
+# ================================================
+# BACKGROUND BATCH SIMULATIONS
+# Large Monte Carlo runs are split into chunks and executed in a process
+# pool, so the Streamlit script thread only submits and polls. Identical
+# requests share one job; chunks that have not started can be cancelled.
+# The pool and its workers start with the first submitted job.
+#
+#   AXON_BATCH_WORKERS=4   worker processes (default: CPUs, at most 4)
+# ================================================
+CHUNK_TRIALS = 20_000
+MAX_FINISHED_JOBS = 64
+# A finished job some session has shown this recently survives memory-pressure eviction.
+VIEWED_SECONDS = 600
+MAX_WORKERS = int(os.environ.get("AXON_BATCH_WORKERS", 0)) or min(4, os.cpu_count() or 1)
+
+def job_key(selection, multipliers, trials, posterior_path=None, seed=0):
+    config = {
+        "selection": sorted(selection),
+        "multipliers": {k: round(v, 6) for k, v in sorted((multipliers or {}).items())},
+        "trials": trials,
+    }
+    return result_key("batch", config, model_version(posterior_path=posterior_path), seed)
+
+# ================================================
+# WORKER SIDE
+# ================================================
+@lru_cache(maxsize=4)
+def _worker_posterior(path):
+    return load_posterior(path) if path else None
+
+def simulate_chunk(selection, multipliers, trials, seed, posterior_path=None):
+    rng = np.random.default_rng(seed)
+    p, outcomes = simulate_batch(load_catalog(), selection, trials, rng,
+                                 _worker_posterior(posterior_path), multipliers)
+    stats = RunningStats()
+    stats.add_batch(p, outcomes)
+    return stats
+
+# ================================================
+# JOBS
+# ================================================
+@dataclass
+class Job:
+    id: str
+    key: str
+    trials: int
+    futures: list
+    created: float = field(default_factory=time.time)
+    viewed: float = field(default_factory=time.time)
+    cancelled: bool = False
+    _merged: RunningStats = field(default_factory=RunningStats)
+    _folded: set = field(default_factory=set)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _stored: bool = False
+
+    @property
+    def progress(self):
+        return sum(f.done() for f in self.futures) / len(self.futures)
+
+    @property
+    def done(self):
+        return all(f.done() for f in self.futures)
+
+    @property
+    def error(self):
+        for f in self.futures:
+            if f.done() and not f.cancelled() and f.exception() is not None:
+                return f.exception()
+        return None
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return "cancelled"
+        if self.error is not None:
+            return "failed"
+        return "done" if self.done else "running"
+
+    def partial(self):
+        # Fold finished chunks in once each; the merged accumulator stays fixed-size.
+        with self._lock:
+            for i, f in enumerate(self.futures):
+                if i not in self._folded and f.done() and not f.cancelled() and f.exception() is None:
+                    self._merged.merge(f.result())
+                    self._folded.add(i)
+            return self._merged
+
+def _mark_main():
+    # Streamlit runs scripts as a __main__ without a spec, which a spawned worker would
+    # re-run as a script on start-up; one named __main__ is left alone, as after `python -m`.
+    main = sys.modules["__main__"]
+    if getattr(main, "__spec__", None) is None:
+        main.__spec__ = ModuleSpec("__main__", None)
+
+def _new_pool(workers):
+    # Spawned workers avoid forking the threaded Streamlit server.
+    executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    # A pool built inside a multiprocessing child (loadtest.py) would otherwise keep
+    # that child waiting on these workers at exit.
+    multiprocessing.util.Finalize(None, executor.shutdown, exitpriority=10)
+    return executor
+
+def _finished_job(key, trials, stats):
+    future = Future()
+    future.set_result(stats)
+    return Job(uuid.uuid4().hex, key, trials, [future])
+
+class JobQueue:
+    def __init__(self, workers=None, cache=None):
+        self.workers = workers or MAX_WORKERS
+        self.executor = None
+        self.jobs = {}
+        self.by_key = {}
+        self.lock = threading.Lock()
+        self.cache = cache
+
+    def submit(self, selection, multipliers=None, trials=100_000, posterior_path=None, seed=0):
+        key = job_key(selection, multipliers, trials, posterior_path, seed)
+        with self.lock:
+            existing = self.by_key.get(key)
+            if existing is not None and existing.status in ("running", "done"):
+                return existing
+
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                job = _finished_job(key, trials, cached)
+                self._register(job)
+                return job
+
+            seeds = np.random.SeedSequence(int(key.partition(":")[2], 16)).spawn((trials + CHUNK_TRIALS - 1) // CHUNK_TRIALS)
+            if self.executor is None:
+                self.executor = _new_pool(self.workers)
+            # Workers start as chunks are submitted, under whichever script is __main__ now.
+            _mark_main()
+            futures = []
+            for i, seed in enumerate(seeds):
+                n = min(CHUNK_TRIALS, trials - i * CHUNK_TRIALS)
+                futures.append(self.executor.submit(
+                    simulate_chunk, frozenset(selection), dict(multipliers or {}), n, seed, posterior_path
+                ))
+            job = Job(uuid.uuid4().hex, key, trials, futures)
+            if self.cache is not None:
+                for f in futures:
+                    f.add_done_callback(lambda _, job=job: self._store(job))
+            self._register(job)
+            return job
+
+    def _register(self, job):
+        self.jobs[job.id] = job
+        self.by_key[job.key] = job
+        self.prune()
+
+    def _store(self, job):
+        # Runs on the pool's callback thread once per chunk; only a complete, clean job is cached.
+        if job.status == "done":
+            with job._lock:
+                if job._stored:
+                    return
+                job._stored = True
+            self.cache.set(job.key, job.partial())
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.viewed = time.time()
+        return job
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job.cancelled = True
+            for f in job.futures:
+                f.cancel()
+            if self.by_key.get(job.key) is job:
+                del self.by_key[job.key]
+
+    def evict(self):
+        # Memory-pressure hook: forget finished jobs no session is showing (results stay in the shared cache).
+        cutoff = time.time() - VIEWED_SECONDS
+        with self.lock:
+            for job in [j for j in self.jobs.values() if j.status != "running" and j.viewed < cutoff]:
+                self._forget(job)
+
+    def prune(self, keep=MAX_FINISHED_JOBS):
+        finished = sorted((j for j in self.jobs.values() if j.status != "running"), key=lambda j: j.created)
+        for job in finished[:max(len(finished) - keep, 0)]:
+            self._forget(job)
+
+    def _forget(self, job):
+        del self.jobs[job.id]
+        if self.by_key.get(job.key) is job:
+            del self.by_key[job.key]
+
+    def shutdown(self):
+        # Unfinished jobs end as cancelled; chunks already handed to a worker may never report back.
+        with self.lock:
+            executor, self.executor = self.executor, None
+            for job in self.jobs.values():
+                if not job.done:
+                    job.cancelled = True
+                    for f in job.futures:
+                        f.cancel()
+            self.by_key = {k: j for k, j in self.by_key.items() if not j.cancelled}
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,149 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from memory import rss_bytes
+
+# ================================================
+# LOAD TEST
+# Drives N simulated students through an app script with Streamlit's
+# AppTest: each session clicks tool buttons, runs simulations and
+# occasionally resets. AppTest keeps one mock runtime per process, so
+# sessions are spread over --workers processes. Within a process they take
+# turns, as sessions on one Streamlit server do, and they share
+# cache_resource objects as in production.
+#
+#   python loadtest.py --sessions 200 --workers 8 --actions 20 app.py
+#
+# Run, stats, cache and session files go to a throwaway AXON_DATA_DIR unless
+# one is given, so load tests never pollute class analytics.
+# ================================================
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+# ================================================
+# SIMULATED STUDENTS (one worker process)
+# ================================================
+def next_click(at, rng):
+    # Returns (kind, action), or (kind, None) when the button isn't on the page.
+    buttons = {b.label: b for b in at.button if not b.disabled}
+    tools = [label for label in buttons if label.startswith("Use ")]
+    # Toolbox tabs render only the open one; switching tabs is a rerun of its own.
+    tabs = [t.label for t in at.tabs]
+    roll = rng.random()
+    if roll < 0.15 and tabs:
+        def switch(label=rng.choice(tabs)):
+            at.session_state["toolbox_tab"] = label
+            at.run()
+        return "tab", switch
+    if roll < 0.55 and tools:
+        kind, label = "tool", rng.choice(tools)
+    elif roll < 0.92:
+        kind, label = "run", "Run Simulation 🚀"
+    else:
+        kind, label = "reset", "Reset ❌"
+    button = buttons.get(label)
+    return kind, (lambda: button.click().run()) if button is not None else None
+
+def worker(script, seeds, actions, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    timings = defaultdict(list)
+    errors = []
+
+    def timed(kind, at, run):
+        t = time.perf_counter()
+        try:
+            run()
+        except Exception as e:
+            errors.append(f"{kind}: {e!r}")
+            return
+        timings[kind].append(time.perf_counter() - t)
+        if at.exception:
+            errors.append(f"{kind}: {at.exception[0].message}")
+
+    rss_start, cpu_start = rss_bytes(), time.process_time()
+    sessions = [(AppTest.from_file(script, default_timeout=timeout), random.Random(seed)) for seed in seeds]
+    for at, _ in sessions:
+        timed("load", at, at.run)
+    for _ in range(actions):
+        for at, rng in sessions:
+            kind, action = next_click(at, rng)
+            if action is not None:
+                timed(kind, at, action)
+
+    return dict(timings), errors, time.process_time() - cpu_start, rss_bytes() - rss_start, rss_bytes()
+
+# ================================================
+# REPORT
+# ================================================
+def run_load_test(script, sessions, workers, actions, seed=0, timeout=60):
+    workers = max(1, min(workers, sessions))
+    shares = [list(range(seed + w, seed + sessions, workers)) for w in range(workers)]
+
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        results = list(pool.map(worker, [script] * workers, shares, [actions] * workers, [timeout] * workers))
+    wall = time.perf_counter() - wall_start
+
+    timings = defaultdict(list)
+    errors = []
+    for worker_timings, worker_errors, _, _, _ in results:
+        for kind, values in worker_timings.items():
+            timings[kind] += values
+        errors += worker_errors
+
+    return {
+        "sessions": sessions,
+        "workers": workers,
+        "wall": wall,
+        "cpu": sum(r[2] for r in results),
+        "rss_per_session": sum(r[3] for r in results) / sessions,
+        "rss_total": sum(r[4] for r in results),
+        "timings": dict(timings),
+        "errors": errors,
+    }
+
+def print_report(report):
+    reruns = sum(len(v) for v in report["timings"].values())
+    print(f"{report['sessions']} sessions on {report['workers']} workers, {reruns} reruns in {report['wall']:.1f}s "
+          f"-> {reruns / report['wall']:.1f} reruns/s")
+    print(f"CPU {report['cpu']:.1f}s ({report['cpu'] / report['wall']:.1f} cores busy), "
+          f"RSS {report['rss_total'] / 2**20:.0f} MiB, ~{report['rss_per_session'] / 2**20:.2f} MiB/session")
+    print(f"{'action':<8}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    everything = []
+    for kind, values in sorted(report["timings"].items()):
+        everything += values
+        print(f"{kind:<8}{len(values):>7}" + "".join(f"{percentile(values, q) * 1000:>10.0f}" for q in (50, 95, 99)))
+    print(f"{'all':<8}{len(everything):>7}" + "".join(f"{percentile(everything, q) * 1000:>10.0f}" for q in (50, 95, 99)))
+    if report["errors"]:
+        print(f"{len(report['errors'])} errors, first: {report['errors'][0]}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent students against the app.")
+    parser.add_argument("script", nargs="?", default="app.py")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--actions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    if "AXON_DATA_DIR" not in os.environ:
+        os.environ["AXON_DATA_DIR"] = tempfile.mkdtemp(prefix="axon-loadtest-")
+    script = os.path.abspath(os.path.join(ROOT, args.script) if not os.path.isabs(args.script) else args.script)
+
+    report = run_load_test(script, args.sessions, args.workers, args.actions, args.seed, args.timeout)
+    print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+# ================================================
+# MEMORY ACCOUNTING AND BUDGET
+# Records per-rerun allocation (tracemalloc, when enabled) and an estimate
+# of each session's state footprint. With a budget set, going over it first
+# runs the registered evictors, and if that is not enough, steps the canvas
+# down to lower resolutions until usage falls back under 70% of the budget.
+# RSS seldom shrinks once Python frees memory, so while over budget another
+# round only runs after usage grows further or a minute has passed; caches
+# get to warm up again in between.
+#
+#   AXON_MEMORY_BUDGET_MB=1500   process budget (default: none)
+#   AXON_TRACEMALLOC=1           trace Python allocations per rerun
+# ================================================
+MAX_LEVEL = 2
+RECOVER_FRACTION = 0.7
+EVICT_GROWTH = 0.05
+EVICT_SECONDS = 60
+SESSION_IDLE_SECONDS = 3600
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # macOS reports ru_maxrss in bytes, Linux in KiB; this is a peak, not current, value.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def deep_sizeof(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(x, seen) for x in obj)
+    return size
+
+class MemoryMonitor:
+    def __init__(self, budget_bytes=None, trace=False):
+        self.budget = budget_bytes
+        self.tracing = trace
+        self.level = 0
+        self.sessions = {}
+        self.evictors = []
+        # (time, RSS after) of the last eviction round.
+        self.last_eviction = None
+        self.lock = threading.Lock()
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls):
+        budget_mb = float(os.environ.get("AXON_MEMORY_BUDGET_MB", 0))
+        return cls(int(budget_mb * 2**20) or None, os.environ.get("AXON_TRACEMALLOC") == "1")
+
+    def register_evictor(self, fn):
+        if fn not in self.evictors:
+            self.evictors.append(fn)
+
+    @property
+    def canvas_scale(self):
+        return 1 / 2 ** self.level
+
+    # ---------------------------------------------
+    # PER-RERUN ACCOUNTING
+    # ---------------------------------------------
+    def begin(self, session_id):
+        # Sessions rerun on separate threads, so traced numbers are process-wide approximations.
+        if self.tracing:
+            tracemalloc.reset_peak()
+            with self.lock:
+                self.sessions.setdefault(session_id, {})["traced_start"] = tracemalloc.get_traced_memory()[0]
+
+    def end(self, session_id, state):
+        record = {"state_bytes": deep_sizeof(dict(state)), "updated": time.time()}
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            start = self.sessions.get(session_id, {}).get("traced_start", current)
+            record["rerun_delta"] = current - start
+            record["rerun_peak"] = peak - start
+        with self.lock:
+            self.sessions.setdefault(session_id, {}).update(record)
+            cutoff = time.time() - SESSION_IDLE_SECONDS
+            for sid in [s for s, r in self.sessions.items() if r.get("updated", 0) < cutoff]:
+                del self.sessions[sid]
+        self.enforce()
+
+    # ---------------------------------------------
+    # BUDGET
+    # ---------------------------------------------
+    def enforce(self):
+        if self.budget is None:
+            return
+        used = rss_bytes()
+        if used > self.budget:
+            with self.lock:
+                last = self.last_eviction
+                if last and used < last[1] + self.budget * EVICT_GROWTH and time.time() < last[0] + EVICT_SECONDS:
+                    return
+                self.last_eviction = (time.time(), used)
+            for evict in self.evictors:
+                evict()
+            gc.collect()
+            used = rss_bytes()
+            self.last_eviction = (time.time(), used)
+            if used > self.budget and self.level < MAX_LEVEL:
+                self.level += 1
+        elif used < self.budget * RECOVER_FRACTION and self.level:
+            self.level -= 1
+
+    def report(self):
+        with self.lock:
+            sessions = dict(self.sessions)
+        states = [r.get("state_bytes", 0) for r in sessions.values()]
+        peaks = [r["rerun_peak"] for r in sessions.values() if "rerun_peak" in r]
+        return {
+            "rss": rss_bytes(),
+            "budget": self.budget,
+            "level": self.level,
+            "sessions": len(sessions),
+            "state_bytes_total": sum(states),
+            "state_bytes_max": max(states, default=0),
+            "rerun_peak_max": max(peaks, default=0),
+        }
+
+    def top_allocations(self, limit=10):
+        if not self.tracing:
+            return []
+        return tracemalloc.take_snapshot().statistics("lineno")[:limit]
@@ -0,0 +1,57 @@
+from functools import lru_cache
+from itertools import chain, combinations, product
+
+import numpy as np
+
+from catalog import selection_from_mask, selection_mask
+from engine import active_effects, default_centers
+
+# ================================================
+# TREATMENT OPTIMIZER
+# The whole treatment space is small (a few thousand valid configurations),
+# so it is enumerated once per catalog and scored as one matrix product.
+# Expected regeneration is the clamped sum of effect centres.
+# ================================================
+def _category_choices(catalog, cat):
+    tools = [t.id for t in catalog.tools_by_category[cat.key]]
+    if cat.exclusive:
+        return [()] + [(t,) for t in tools]
+    return list(chain.from_iterable(combinations(tools, r) for r in range(len(tools) + 1)))
+
+@lru_cache(maxsize=None)
+def configuration_space(catalog):
+    params = ("baseline",) + tuple(catalog.effect_params)
+    column = {name: i for i, name in enumerate(params)}
+
+    choices = [_category_choices(catalog, cat) for cat in catalog.categories]
+    masks, sizes, rows = [], [], []
+    for combo in product(*choices):
+        selection = frozenset(chain.from_iterable(combo))
+        row = np.zeros(len(params))
+        row[0] = 1.0
+        for tool in active_effects(catalog, selection):
+            row[column[tool.param]] = 1.0
+        masks.append(selection_mask(catalog, selection))
+        sizes.append(len(selection))
+        rows.append(row)
+
+    return params, np.array(masks, dtype=np.int64), np.array(sizes), np.array(rows)
+
+def suggest(catalog, centers=None, max_tools=None, exclude=(), require=()):
+    params, masks, sizes, X = configuration_space(catalog)
+    centers = centers or default_centers(catalog)
+    theta = np.array([centers[p] for p in params])
+    scores = np.clip(X @ theta, catalog.model["floor"], catalog.model["ceiling"])
+
+    excluded = selection_mask(catalog, exclude)
+    required = selection_mask(catalog, require)
+    ok = ((masks & excluded) == 0) & ((masks & required) == required)
+    if max_tools is not None:
+        ok &= sizes <= max_tools
+    if not ok.any():
+        return None, None
+
+    # Best score first, then the fewest interventions that reach it.
+    candidates = np.flatnonzero(ok)
+    best = candidates[np.lexsort((sizes[candidates], -scores[candidates]))[0]]
+    return selection_from_mask(catalog, int(masks[best])), float(scores[best])
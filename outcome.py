@@ -0,0 +1,165 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+from encoding import Encoder
+
+# ================================================
+# PROCEDURAL OUTCOME
+# Each simulated run is drawn as axons sprouting from the proximal stump
+# into the injury gap of injured_axon_gap.png. The run's success
+# probability sets how many sprout; on a success a share of them cross and
+# follow the distal stump, on a failure they all stall in the gap and end in
+# retraction bulbs. A scaffold keeps growth straighter. The run id seeds the
+# drawing (run ids are hex), so every run looks different but redraws
+# identically.
+# ================================================
+ORIGIN = (598.0, 528.0)      # proximal stump tip
+DISTAL_ENTRY = 640.0         # where the distal stump begins
+TARGET = (790.0, 540.0)      # end of the distal stump
+BOX = (576, 448, 816, 608)   # region trajectories may cover; 8-pixel aligned
+STEPS = 192                  # samples per axon, about one per pixel of the longest
+MAX_RUNS = 256
+
+CROSSED_RGB = np.array([70, 225, 120], np.float32)
+STALLED_RGB = np.array([120, 95, 200], np.float32)
+KERNEL = [(dx, dy, w) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for w in [(1.0, 0.6, 0.35)[abs(dx) + abs(dy)]]]
+BULB = [(dx, dy, 0.8) for dx in range(-2, 3) for dy in range(-2, 3) if dx * dx + dy * dy <= 5]
+
+@dataclass(frozen=True)
+class RunLayer:
+    # A canvas layer for one simulated run; goes anywhere an overlay path does.
+    run_id: str
+    probability: float
+    outcome: bool
+    guided: bool = False
+
+    def __str__(self):
+        return f"run:{self.run_id}"
+
+    def bbox(self, reduce=1):
+        x0, y0, x1, y1 = BOX
+        return x0 // reduce, y0 // reduce, -(-x1 // reduce), -(-y1 // reduce)
+
+    def sprite(self, reduce=1):
+        return RENDERER.sprite(self, reduce)
+
+    def url(self):
+        return RENDERER.url(self)
+
+    def stats(self):
+        return RENDERER.stats(self)
+
+class OutcomeRenderer:
+    def __init__(self, max_runs=MAX_RUNS, encoder=None):
+        x0, y0, x1, y1 = BOX
+        self.size = (x1 - x0, y1 - y0)
+        # Reused for every run: two coverage planes (crossed, stalled) and the RGBA output.
+        self.coverage = np.zeros((2, self.size[1], self.size[0]), np.float32)
+        self.alpha = np.zeros((2, self.size[1], self.size[0]), np.float32)
+        self.pixels = np.zeros((self.size[1], self.size[0], 4), np.uint8)
+        self.encoder = encoder or Encoder.from_spec()
+        self.max_runs = max_runs
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    # ---------------------------------------------
+    # TRAJECTORIES
+    # ---------------------------------------------
+    def trajectories(self, run):
+        rng = np.random.default_rng(int(run.run_id, 16))
+        p = float(run.probability)
+        n = 10 + int(round(40 * p))
+        crossed = np.zeros(n, bool)
+        if run.outcome:
+            crossed[:max(1, int(round(n * (0.35 + 0.65 * p))))] = True
+
+        full = TARGET[0] - ORIGIN[0]
+        length = np.where(crossed, full * rng.uniform(1.0, 1.15, n), rng.uniform(20, 90, n) * (0.4 + 0.6 * p))
+        step = (length / STEPS).astype(np.float32)
+        slope = (TARGET[1] - ORIGIN[1]) / full
+
+        # Growth cones steer by a heading random walk. Crossing axons are pulled back
+        # towards the stump axis, hard once inside the distal stump; stalled ones curl.
+        turn = np.where(crossed, 0.14, 0.28).astype(np.float32) * (0.6 if run.guided else 1.0)
+        noise = rng.normal(0.0, 1.0, (STEPS, n)).astype(np.float32) * turn
+        heading = rng.normal(0.0, 0.45, n).astype(np.float32)
+        x = np.empty((STEPS, n), np.float32)
+        y = np.empty((STEPS, n), np.float32)
+        x[0], y[0] = ORIGIN
+        for i in range(1, STEPS):
+            offset = y[i - 1] - (ORIGIN[1] + (x[i - 1] - ORIGIN[0]) * slope)
+            pull = np.where(x[i - 1] > DISTAL_ENTRY, 0.03, 0.002)
+            heading = np.where(crossed, heading * 0.96 - pull * offset, heading) + noise[i]
+            x[i] = x[i - 1] + step * np.cos(heading)
+            y[i] = y[i - 1] + step * np.sin(heading)
+        # Stalled axons never reach the distal stump.
+        np.minimum(x, np.where(crossed, np.inf, DISTAL_ENTRY - 4), out=x)
+        return x.T, y.T, crossed
+
+    # ---------------------------------------------
+    # RASTERIZATION
+    # ---------------------------------------------
+    def _splat(self, plane, x, y, kernel):
+        w, h = self.size
+        xi = np.rint(x).astype(np.int32).ravel() - BOX[0]
+        yi = np.rint(y).astype(np.int32).ravel() - BOX[1]
+        flat = plane.ravel()
+        for dx, dy, weight in kernel:
+            px, py = xi + dx, yi + dy
+            keep = (px >= 0) & (px < w) & (py >= 0) & (py < h)
+            np.add.at(flat, py[keep] * w + px[keep], weight)
+
+    def rasterize(self, run):
+        x, y, crossed = self.trajectories(run)
+        with self.lock:
+            self.coverage.fill(0.0)
+            self._splat(self.coverage[0], x[crossed], y[crossed], KERNEL)
+            self._splat(self.coverage[1], x[~crossed], y[~crossed], KERNEL)
+            self._splat(self.coverage[1], x[~crossed, -1], y[~crossed, -1], BULB)
+
+            # alpha = 1 - exp(-k * coverage), then colours mixed by each plane's share of the alpha.
+            np.multiply(self.coverage, -0.9, out=self.alpha)
+            np.exp(self.alpha, out=self.alpha)
+            np.subtract(1.0, self.alpha, out=self.alpha)
+            total = np.clip(self.alpha.sum(axis=0), 1e-6, None)
+            share = self.alpha[0] / total
+            rgb = share[..., None] * CROSSED_RGB + (1.0 - share[..., None]) * STALLED_RGB
+            self.pixels[..., :3] = rgb
+            self.pixels[..., 3] = np.clip(total, 0.0, 1.0) * 255
+            return Image.fromarray(self.pixels.copy(), "RGBA")
+
+    def _cached(self, key, make):
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        value = make()
+        with self.lock:
+            self.cache[key] = value
+            while len(self.cache) > self.max_runs:
+                self.cache.popitem(last=False)
+        return value
+
+    def sprite(self, run, reduce=1):
+        if reduce == 1:
+            return self._cached((run, 1), lambda: (self.rasterize(run), (BOX[0], BOX[1])))
+        return self._cached((run, reduce), lambda: (self.sprite(run)[0].reduce(reduce), (BOX[0] // reduce, BOX[1] // reduce)))
+
+    def url(self, run):
+        return self._cached((run, "url"), lambda: self.encoder.data_url(self.encoder.encode(self.sprite(run)[0])))
+
+    def stats(self, run):
+        def make():
+            x, y, crossed = self.trajectories(run)
+            return {"sprouted": len(crossed), "crossed": int(crossed.sum())}
+        return self._cached((run, "stats"), make)
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+RENDERER = OutcomeRenderer()
@@ -0,0 +1,105 @@
+import streamlit as st
+import datetime
+import numpy as np
+
+from catalog import load_catalog, selection_from_mask
+from pharmacology import dose_label
+from runlog import daily_aggregates, refresh_aggregates
+
+# ================================================
+# PAGE CONFIG
+# ================================================
+st.set_page_config(page_title="Class Analytics", layout="wide")
+st.title("📈 Class Analytics")
+
+CATALOG = load_catalog()
+
+# ================================================
+# DATA — incremental aggregates, reloaded only when new runs arrive
+# ================================================
+@st.cache_data(ttl=10, show_spinner=False)
+def watermark():
+    return refresh_aggregates()
+
+def load_aggregates():
+    rows = daily_aggregates()
+    if not rows:
+        return None
+    day, config, doses, runs, successes, probability_sum = (np.array(c) for c in zip(*rows))
+    return {"day": day, "config": config, "doses": doses, "runs": runs, "successes": successes,
+            "probability_sum": probability_sum}
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def summarize(mark):
+    agg = load_aggregates()
+    if agg is None:
+        return None
+    runs, successes = agg["runs"], agg["successes"]
+
+    by_tool = []
+    for tool in CATALOG.tools:
+        used = (agg["config"] >> tool.bit) & 1 == 1
+        n = runs[used].sum()
+        by_tool.append((tool.label, int(n), successes[used].sum() / n if n else 0.0))
+
+    # A combination is a selection at given doses; the same tools at other doses are listed apart.
+    combos = {}
+    for config, doses, n, s in zip(agg["config"], agg["doses"], runs, successes):
+        total = combos.setdefault((int(config), str(doses)), [0, 0])
+        total[0] += n
+        total[1] += s
+    by_combination = sorted(((c, d, int(n), s / n) for (c, d), (n, s) in combos.items()), key=lambda r: -r[2])[:25]
+
+    days, didx = np.unique(agg["day"], return_inverse=True)
+    day_runs = np.bincount(didx, weights=runs)
+    day_successes = np.bincount(didx, weights=successes)
+    # runs_daily buckets by ts / 86400, i.e. UTC days; label them as such in every time zone.
+    over_time = [(datetime.datetime.fromtimestamp(int(d) * 86400, datetime.timezone.utc).date(), int(n), s / n)
+                 for d, n, s in zip(days, day_runs, day_successes)]
+
+    totals = (int(runs.sum()), successes.sum() / runs.sum(), agg["probability_sum"].sum() / runs.sum())
+    return totals, by_tool, by_combination, over_time
+
+def combination_label(config, doses):
+    tools = selection_from_mask(CATALOG, config)
+    label = " + ".join(t.label for t in CATALOG.tools if t.id in tools) or "No treatment"
+    if doses:
+        label += f" ({dose_label(doses)})"
+    return label
+
+# ================================================
+# DASHBOARD
+# ================================================
+summary = summarize(watermark())
+
+if summary is None:
+    st.info("No simulation runs have been logged yet.")
+    st.stop()
+
+(total_runs, success_rate, mean_probability), by_tool, by_combination, over_time = summary
+
+m1, m2, m3 = st.columns(3)
+m1.metric("Logged Runs", f"{total_runs:,}")
+m2.metric("Observed Success", f"{success_rate*100:.1f}%")
+m3.metric("Mean Probability", f"{mean_probability*100:.1f}%")
+
+st.header("Success Rate by Treatment")
+st.bar_chart(
+    {"Treatment": [t for t, _, _ in by_tool], "Success Rate": [r for _, _, r in by_tool]},
+    x="Treatment", y="Success Rate",
+)
+
+st.header("Success Rate over Time")
+st.line_chart(
+    {"Day": [d for d, _, _ in over_time], "Success Rate": [r for _, _, r in over_time]},
+    x="Day", y="Success Rate",
+)
+
+st.header("Most Common Combinations")
+st.dataframe(
+    {
+        "Combination": [combination_label(c, d) for c, d, _, _ in by_combination],
+        "Runs": [n for _, _, n, _ in by_combination],
+        "Success Rate": [f"{r*100:.1f}%" for _, _, _, r in by_combination],
+    },
+)
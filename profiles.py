@@ -0,0 +1,115 @@
+import json
+import os
+from dataclasses import dataclass, fields
+from functools import lru_cache
+
+from catalog import ROOT
+
+# ================================================
+# LAYOUT AND BEHAVIOUR PROFILES
+# The former app.py … app7.py variants, expressed as data. A profile may
+# extend another and override single settings.
+# ================================================
+PROFILES_PATH = os.path.join(ROOT, "profiles.json")
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    font_size: int
+    font_weight: int
+    button_height: int
+    button_radius: str | None
+    panel_padding: str
+    panel_radius: str
+    panel_border_alpha: float
+    canvas: str
+    canvas_width: int | str
+    canvas_css_width: str | None
+    canvas_css_max_width: str | None
+    columns: tuple
+    icon_size: int
+    toolbox: str
+    animation: str
+    outcome_banner: bool
+    hide_tools: frozenset
+
+def _resolve(raw, name, seen=()):
+    if name in seen:
+        raise ValueError(f"profile {name!r} extends itself")
+    if name not in raw:
+        raise ValueError(f"unknown profile {name!r}")
+    entry = dict(raw[name])
+    parent = entry.pop("extends", None)
+    return {**(_resolve(raw, parent, seen + (name,)) if parent else {}), **entry}
+
+def parse_profiles(data):
+    names = {f.name for f in fields(Profile)} - {"name"}
+    profiles = {}
+    for name in data["profiles"]:
+        values = _resolve(data["profiles"], name)
+        missing = names - set(values)
+        if missing:
+            raise ValueError(f"profile {name!r} is missing {sorted(missing)}")
+        if values["toolbox"] not in ("tabs", "stacked"):
+            raise ValueError(f"profile {name!r}: toolbox must be 'tabs' or 'stacked'")
+        if values["canvas"] not in ("client", "delta", "server"):
+            raise ValueError(f"profile {name!r}: canvas must be 'client', 'delta' or 'server'")
+        if values["animation"] not in ("queue", "inline"):
+            raise ValueError(f"profile {name!r}: animation must be 'queue' or 'inline'")
+        values = {k: values[k] for k in names}
+        values["columns"] = tuple(values["columns"])
+        values["hide_tools"] = frozenset(values["hide_tools"])
+        profiles[name] = Profile(name=name, **values)
+    if data["default"] not in profiles:
+        raise ValueError(f"default profile {data['default']!r} is not defined")
+    return profiles, data["default"]
+
+@lru_cache(maxsize=None)
+def load_profiles(path=PROFILES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return parse_profiles(json.load(f))
+
+def select_profile(requested=None, path=PROFILES_PATH):
+    # URL ?profile= wins, then AXON_PROFILE, then the file's default.
+    profiles, default = load_profiles(path)
+    for name in (requested, os.environ.get("AXON_PROFILE")):
+        if name in profiles:
+            return profiles[name]
+    return profiles[default]
+
+def profile_css(p):
+    radius = f"\n    border-radius: {p.button_radius} !important;" if p.button_radius else ""
+    canvas = ""
+    if p.canvas_css_width:
+        canvas = f"""
+img[data-testid="stImage"] {{
+    width: {p.canvas_css_width} !important;
+    max-width: {p.canvas_css_max_width or p.canvas_css_width} !important;
+    height: auto !important;
+    object-fit: contain !important;
+}}"""
+    return f"""
+<style>
+html, body, [class*="css"] {{
+    font-size: {p.font_size}px !important;
+}}
+h1, h2, h3 {{
+    font-weight: 800 !important;
+}}
+.toolbox-panel {{
+    background-color: rgba(25, 25, 35, 0.92);
+    padding: {p.panel_padding};
+    border-radius: {p.panel_radius};
+    border: 1px solid rgba(255,255,255,{p.panel_border_alpha});
+}}
+
+/* BUTTONS */
+div.stButton > button {{
+    width: 100% !important;
+    height: {p.button_height}px !important;
+    font-size: {p.font_size}px !important;
+    font-weight: {p.font_weight} !important;{radius}
+}}
+{canvas}
+</style>
+"""
@@ -0,0 +1,149 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from assets import compose, load_layer, load_sprite
+from catalog import load_catalog, selection_mask
+from encoding import Encoder
+
+# ================================================
+# HEADLESS RENDERING
+# Canvases for treatment configurations without Streamlit, for course
+# materials and reports. A configuration is a set of tool ids; its canvas
+# is injured_axon_gap.png with the overlay of every tool that has one.
+#
+#   python render.py configs.csv --out canvases/ --workers 8
+#
+# The CSV needs a `treatments` column of ';'-separated tool ids (as for
+# calibrate.py) and may have a `name` column for the file name (letters,
+# digits, '.', '_' and '-'; names must be unique). Rows that can't be
+# rendered are reported by line and skipped. Layers are
+# decoded once in the parent before the pool forks, so workers share them
+# rather than each decoding its own. Configurations that draw the same
+# canvas are rendered once. Each worker encodes and writes its images as it
+# finishes them, so nothing is held back for the end of the batch.
+# ================================================
+DEFAULT_ENCODER = "png:85:1"
+EXTENSIONS = {"png": ".png", "webp": ".webp", "jpeg": ".jpg"}
+NAME = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*")
+
+def configuration_layers(catalog, selection):
+    # Base image, then one overlay (or None) per slot in catalog.overlay_order.
+    unknown = set(selection) - set(catalog.tool_by_id)
+    if unknown:
+        raise ValueError(f"unknown treatments: {sorted(unknown)}")
+    slots = dict.fromkeys(catalog.overlay_order)
+    for tool_id in selection:
+        tool = catalog.tool_by_id[tool_id]
+        cat = catalog.category_of(tool_id)
+        if not tool.overlay:
+            continue
+        if slots[cat.overlay_slot] not in (None, tool.overlay):
+            raise ValueError(f"only one {cat.label.lower()} treatment may be chosen")
+        slots[cat.overlay_slot] = tool.overlay
+    return (catalog.base_image, *slots.values())
+
+def render_configuration(catalog, selection, reduce=1):
+    layers = configuration_layers(catalog, selection)
+    return compose(layers[0], layers[1:], reduce)
+
+def warm(layer_sets, reduce=1):
+    # Decode every layer once, so forked workers inherit the decoded images.
+    for layers in layer_sets:
+        load_layer(layers[0], reduce)
+        for path in layers[1:]:
+            if path:
+                load_sprite(path, reduce)
+
+# ================================================
+# BATCH
+# ================================================
+def read_configurations(path):
+    # Yields (line number, name or None, selection).
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    with f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            selection = frozenset(t.strip() for t in (row.get("treatments") or "").split(";") if t.strip())
+            yield reader.line_num, (row.get("name") or "").strip() or None, selection
+
+def _render_job(job):
+    layers, targets, reduce, spec = job
+    encoder = Encoder.from_spec(spec)
+    data = encoder.encode(compose(layers[0], layers[1:], reduce))
+    for target in targets:
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+    return targets, len(data)
+
+def plan_batch(catalog, configurations, out_dir, ext, on_error=None):
+    # {layers: [target paths]}; rows with a bad name or selection are passed to on_error(line, name, message) and skipped.
+    groups = {}
+    named = {}
+    for line, name, selection in configurations:
+        try:
+            layers = configuration_layers(catalog, selection)
+            name = name or f"config-{selection_mask(catalog, selection):x}"
+            if not NAME.fullmatch(name):
+                raise ValueError("names may only use letters, digits, '.', '_' and '-'")
+            if named.setdefault(name, selection) != selection:
+                raise ValueError("name already used by an earlier row with other treatments")
+        except ValueError as e:
+            if on_error is None:
+                raise ValueError(f"line {line} ({name or 'unnamed'}): {e}") from None
+            on_error(line, name, str(e))
+            continue
+        groups.setdefault(layers, []).append(os.path.join(out_dir, name + ext))
+    return groups
+
+def render_batch(catalog, configurations, out_dir, reduce=1, spec=DEFAULT_ENCODER, workers=None, on_error=None):
+    # Yields (paths written, bytes per image) as each distinct canvas is finished.
+    ext = EXTENSIONS[Encoder.from_spec(spec).format]
+    groups = plan_batch(catalog, configurations, out_dir, ext, on_error)
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(layers, list(dict.fromkeys(targets)), reduce, spec) for layers, targets in groups.items()]
+    warm(groups, reduce)
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(workers or os.cpu_count()) as pool:
+        yield from pool.imap_unordered(_render_job, jobs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render canvases for treatment configurations.")
+    parser.add_argument("configs", help="CSV with a `treatments` column (and optionally `name`), or - for stdin")
+    parser.add_argument("--out", default="canvases")
+    parser.add_argument("--reduce", type=int, default=1, help="downscale factor")
+    parser.add_argument("--encoder", default=DEFAULT_ENCODER, help="format[:quality[:effort]], as AXON_CANVAS_ENCODER")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    skipped = []
+
+    def skip(line, name, message):
+        skipped.append(line)
+        print(f"  line {line} ({name or 'unnamed'}) skipped: {message}", file=sys.stderr)
+
+    start = time.perf_counter()
+    images = canvases = total = 0
+    for targets, size in render_batch(catalog, read_configurations(args.configs), args.out,
+                                      args.reduce, args.encoder, args.workers, skip):
+        canvases += 1
+        images += len(targets)
+        total += size * len(targets)
+        print(f"  {os.path.basename(targets[0])}" + (f" (+{len(targets) - 1} same)" if len(targets) > 1 else ""))
+    print(f"{images} images ({canvases} distinct canvases, {total / 2**20:.1f} MiB) "
+          f"in {time.perf_counter() - start:.1f}s -> {args.out}")
+    if skipped:
+        print(f"{len(skipped)} rows skipped", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
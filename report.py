@@ -0,0 +1,99 @@
+import datetime
+import html
+
+from catalog import selection_from_mask
+from pharmacology import dose_label
+
+# ================================================
+# REPORT EXPORT
+# A self-contained HTML report of a session: the configuration, the
+# probability distribution of its repeated runs, the canvas and the run
+# history. The document is produced as a stream of small chunks over the
+# run log cursor, joined once when downloaded; the history is capped at
+# HISTORY_ROWS, so it stays a few megabytes at most, and the canvas is the
+# renderer's cached, already-encoded frame. Print styles let the browser
+# save it as a PDF.
+# ================================================
+HISTORY_ROWS = 10_000
+
+STYLE = """
+body { font-family: system-ui, sans-serif; margin: 2rem auto; max-width: 60rem; color: #222; }
+h1 { margin-bottom: 0.2rem; }
+table { border-collapse: collapse; margin: 0.5rem 0 1.5rem; }
+th, td { border-bottom: 1px solid #ddd; padding: 0.25rem 0.75rem; text-align: left; }
+td.num { text-align: right; font-variant-numeric: tabular-nums; }
+.canvas { width: 100%; max-width: 32rem; }
+.muted { color: #777; }
+@media print { body { margin: 0; max-width: none; } section { break-inside: avoid; } }
+"""
+
+def _e(text):
+    return html.escape(str(text))
+
+def _configuration(catalog, selection, doses):
+    yield "<section><h2>Configuration</h2>"
+    tools = [t for t in catalog.tools if t.id in selection]
+    if not tools:
+        yield '<p class="muted">No treatment.</p></section>'
+        return
+    yield "<table><tr><th>Category</th><th>Treatment</th><th>Dose</th></tr>"
+    for tool in tools:
+        dose = ""
+        if tool.pk and tool.id in doses:
+            amount, day = doses[tool.id]
+            dose = f"{amount:g} {tool.pk['dose_unit']}, day {day}"
+        yield f"<tr><td>{_e(catalog.category_of(tool.id).label)}</td><td>{_e(tool.label)}</td><td>{_e(dose)}</td></tr>"
+    yield "</table></section>"
+
+def _distribution(stats):
+    yield "<section><h2>Probability Distribution</h2>"
+    if not stats.n:
+        yield '<p class="muted">This configuration has not been run yet.</p></section>'
+        return
+    yield (f"<p>{stats.n:,} runs · mean probability {stats.mean * 100:.1f}% ± {1.96 * stats.stderr * 100:.1f} · "
+           f"observed success {stats.success_rate * 100:.1f}%</p>")
+    # A bar per histogram bin, as inline SVG.
+    w, h, bins = 600, 160, len(stats.hist)
+    top = max(stats.hist) or 1
+    bar = w / bins
+    yield f'<svg viewBox="0 0 {w} {h + 20}" width="100%" role="img" aria-label="Runs by success probability">'
+    for i, count in enumerate(stats.hist):
+        height = h * count / top
+        yield (f'<rect x="{i * bar + 1:.1f}" y="{h - height:.1f}" width="{bar - 2:.1f}" height="{height:.1f}" '
+               f'fill="#4c78a8"><title>{count} runs</title></rect>')
+    edges = stats.bin_edges()
+    for i in range(0, bins + 1, max(1, bins // 5)):
+        yield f'<text x="{min(i * bar, w - 12):.1f}" y="{h + 15}" font-size="11">{edges[i] * 100:.0f}%</text>'
+    yield "</svg></section>"
+
+def _history(catalog, runs):
+    yield "<section><h2>Run History</h2>"
+    labels = {}
+    shown = 0
+    for ts, config, doses, probability, outcome in runs:
+        if shown == 0:
+            yield "<table><tr><th>#</th><th>Time</th><th>Treatments</th><th>Probability</th><th>Outcome</th></tr>"
+        if shown == HISTORY_ROWS:
+            yield f'</table><p class="muted">Only the first {HISTORY_ROWS:,} runs are listed.</p></section>'
+            return
+        if (config, doses) not in labels:
+            tools = selection_from_mask(catalog, config)
+            label = ", ".join(t.label for t in catalog.tools if t.id in tools) or "No treatment"
+            if doses:
+                label += f" ({dose_label(doses)})"
+            labels[config, doses] = _e(label)
+        when = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+        shown += 1
+        yield (f'<tr><td class="num">{shown}</td><td>{when}</td><td>{labels[config, doses]}</td>'
+               f'<td class="num">{probability * 100:.1f}%</td><td>{"Success" if outcome else "Failure"}</td></tr>')
+    yield "</table></section>" if shown else '<p class="muted">No runs yet.</p></section>'
+
+def report_chunks(catalog, selection, doses, stats, canvas_url, runs, title="Axon Regeneration Report"):
+    # runs: (ts, config, doses, probability, outcome) rows, consumed lazily.
+    yield f'<!doctype html><html><head><meta charset="utf-8"><title>{_e(title)}</title><style>{STYLE}</style></head><body>'
+    yield f'<h1>{_e(title)}</h1><p class="muted">Generated {datetime.datetime.now():%Y-%m-%d %H:%M}</p>'
+    yield from _configuration(catalog, selection, doses)
+    yield f'<section><h2>Canvas</h2><img class="canvas" src="{canvas_url}" alt="Simulation canvas"></section>'
+    yield from _distribution(stats)
+    yield from _history(catalog, runs)
+    yield "</body></html>"
@@ -0,0 +1,174 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from catalog import DATA_DIR, check_bits, load_catalog
+
+# ================================================
+# EXPERIMENT LOG
+# Every simulation run is appended to a WAL-mode SQLite table. The run
+# handler only appends to an in-memory buffer; a background thread writes
+# the buffer in one transaction every FLUSH_SECONDS (or sooner once
+# FLUSH_ROWS pile up), so logging costs microseconds on the script thread.
+# Each run carries its selection mask and dose key (pharmacology.dose_key).
+# ================================================
+RUNLOG_PATH = os.path.join(DATA_DIR, "axon_runs.sqlite")
+FLUSH_SECONDS = 0.5
+FLUSH_ROWS = 512
+
+log = logging.getLogger(__name__)
+
+# Materialised per-day, per-configuration totals, maintained incrementally from runs.
+RUNS_DAILY = (
+    "CREATE TABLE IF NOT EXISTS runs_daily ("
+    " day INTEGER NOT NULL, config INTEGER NOT NULL, doses TEXT NOT NULL, runs INTEGER NOT NULL,"
+    " successes INTEGER NOT NULL, probability_sum REAL NOT NULL, PRIMARY KEY (day, config, doses))"
+)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    " ts REAL NOT NULL, session TEXT NOT NULL, config INTEGER NOT NULL,"
+    " probability REAL NOT NULL, outcome INTEGER NOT NULL, doses TEXT NOT NULL DEFAULT '*')",
+    "CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts)",
+    "CREATE INDEX IF NOT EXISTS runs_config ON runs (config)",
+    "CREATE INDEX IF NOT EXISTS runs_session ON runs (session, ts)",
+    RUNS_DAILY,
+    "CREATE TABLE IF NOT EXISTS runs_daily_watermark (last_rowid INTEGER NOT NULL)",
+)
+
+def connect(path=RUNLOG_PATH):
+    db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+def _columns(db, table):
+    return {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+
+def _prepare(db, catalog=None):
+    for statement in SCHEMA:
+        db.execute(statement)
+    catalog = catalog or load_catalog()
+    check_bits(db, catalog)
+    # Logs from before runs carried doses: runs with a dosed tool get '*', an unknown dose,
+    # the rest no dose key, and the daily totals are rebuilt with the dose column.
+    db.execute("BEGIN IMMEDIATE")
+    if "doses" not in _columns(db, "runs"):
+        db.execute("ALTER TABLE runs ADD COLUMN doses TEXT NOT NULL DEFAULT '*'")
+        dosed = sum(1 << t.bit for t in catalog.tools if t.pk)
+        db.execute("UPDATE runs SET doses = '' WHERE config & ? = 0", (dosed,))
+    if "doses" not in _columns(db, "runs_daily"):
+        db.execute("DROP TABLE runs_daily")
+        db.execute("DELETE FROM runs_daily_watermark")
+        db.execute(RUNS_DAILY)
+    db.execute("COMMIT")
+
+class RunLog:
+    def __init__(self, path=RUNLOG_PATH, catalog=None):
+        self.path = path
+        with closing(connect(path)) as db:
+            _prepare(db, catalog)
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closed = False
+        self.writer = threading.Thread(target=self._run, name="runlog-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def append(self, session, config, probability, outcome, doses="", ts=None):
+        with self.lock:
+            self.buffer.append((ts or time.time(), session, config, float(probability), int(bool(outcome)), doses))
+            if len(self.buffer) >= FLUSH_ROWS:
+                self.wake.set()
+
+    def flush(self):
+        # One flush at a time, so a caller that flushes before reading only returns once
+        # rows another flush already took from the buffer are committed too.
+        with self.flush_lock:
+            with self.lock:
+                rows, self.buffer = self.buffer, []
+            if not rows:
+                return 0
+            try:
+                with closing(connect(self.path)) as db:
+                    db.execute("BEGIN IMMEDIATE")
+                    db.executemany(
+                        "INSERT INTO runs (ts, session, config, probability, outcome, doses)"
+                        " VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    db.execute("COMMIT")
+            except (sqlite3.Error, OSError) as exc:
+                # Keep the rows, ahead of anything appended since, for the next flush.
+                with self.lock:
+                    self.buffer[:0] = rows
+                log.warning("run log flush of %d rows failed, will retry: %s", len(rows), exc)
+                return 0
+            return len(rows)
+
+    def _run(self):
+        while not self.closed:
+            self.wake.wait(FLUSH_SECONDS)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # The writer must outlive any one bad batch, or appends pile up unwritten.
+                log.exception("run log writer error")
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.wake.set()
+            self.writer.join(timeout=5)
+            self.flush()
+
+# ================================================
+# QUERIES
+# ================================================
+def runs_by_config(path=RUNLOG_PATH, since=None):
+    with closing(connect(path)) as db:
+        return db.execute(
+            "SELECT config, COUNT(*), SUM(outcome), AVG(probability) FROM runs"
+            " WHERE ts >= ? GROUP BY config ORDER BY COUNT(*) DESC",
+            (since or 0,),
+        ).fetchall()
+
+def session_runs(session, path=RUNLOG_PATH, batch=FLUSH_ROWS):
+    # Oldest first, fetched in batches so a long history is never held at once.
+    with closing(connect(path)) as db:
+        cursor = db.execute(
+            "SELECT ts, config, doses, probability, outcome FROM runs WHERE session = ? ORDER BY ts", (session,))
+        while rows := cursor.fetchmany(batch):
+            yield from rows
+
+def refresh_aggregates(path=RUNLOG_PATH, catalog=None):
+    # Folds only rows appended since the last refresh into runs_daily; returns the new watermark.
+    with closing(connect(path)) as db:
+        _prepare(db, catalog)
+        db.execute("BEGIN IMMEDIATE")
+        row = db.execute("SELECT last_rowid FROM runs_daily_watermark").fetchone()
+        last = row[0] if row else 0
+        top = db.execute("SELECT COALESCE(MAX(rowid), 0) FROM runs").fetchone()[0]
+        if top > last:
+            db.execute(
+                "INSERT INTO runs_daily (day, config, doses, runs, successes, probability_sum)"
+                " SELECT CAST(ts / 86400 AS INTEGER), config, doses, COUNT(*), SUM(outcome), SUM(probability)"
+                " FROM runs WHERE rowid > ? AND rowid <= ? GROUP BY 1, 2, 3"
+                " ON CONFLICT (day, config, doses) DO UPDATE SET"
+                " runs = runs + excluded.runs, successes = successes + excluded.successes,"
+                " probability_sum = probability_sum + excluded.probability_sum",
+                (last, top),
+            )
+            db.execute("DELETE FROM runs_daily_watermark")
+            db.execute("INSERT INTO runs_daily_watermark VALUES (?)", (top,))
+        db.execute("COMMIT")
+        return max(top, last)
+
+def daily_aggregates(path=RUNLOG_PATH):
+    with closing(connect(path)) as db:
+        return db.execute("SELECT day, config, doses, runs, successes, probability_sum FROM runs_daily").fetchall()
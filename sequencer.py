@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from encoding import Encoder
+
+# ================================================
+# FRAME SEQUENCER
+# Plays a tool's animation, a single still or a list of frames, through one
+# placeholder. Frames are decoded once per process, fitted to the canvas,
+# and shared by every session. Cross-fades are blended into per-thread
+# buffers that are reused across frames. Each emitted frame is encoded once
+# and memoized, so later plays of the same sequence only send images.
+# ================================================
+HOLD_SECONDS = 0.45
+STILL_SECONDS = 1.0
+FADE_SECONDS = 0.24
+FADE_STEPS = 4
+# Transient frames favour encode speed over size.
+ANIMATION_ENCODER = "jpeg:80:1"
+MAX_FRAMES = 64
+MAX_ENCODED = 256
+
+class FramePool:
+    def __init__(self, size=(1024, 1024), encoder=None, max_frames=MAX_FRAMES, max_encoded=MAX_ENCODED):
+        self.size = tuple(size)
+        self.encoder = encoder or Encoder.from_spec(ANIMATION_ENCODER)
+        self.max_frames = max_frames
+        self.max_encoded = max_encoded
+        self.frames = OrderedDict()
+        self.encoded = OrderedDict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def _cached(self, store, limit, key, make):
+        with self.lock:
+            if key in store:
+                store.move_to_end(key)
+                return store[key]
+        value = make()
+        with self.lock:
+            store[key] = value
+            while len(store) > limit:
+                store.popitem(last=False)
+        return value
+
+    def frame(self, path, reduce=1):
+        # Decoded RGB pixels, cropped and scaled to fill the canvas (frames may differ in aspect).
+        def load():
+            size = (self.size[0] // reduce, self.size[1] // reduce)
+            with Image.open(path) as img:
+                return np.asarray(ImageOps.fit(img.convert("RGB"), size, Image.BILINEAR))
+        return self._cached(self.frames, self.max_frames, (path, reduce), load)
+
+    def blend(self, a, b, t):
+        # a + (b - a) * t into this thread's buffers; the result is overwritten by the next blend.
+        bufs = getattr(self.local, "bufs", None)
+        if bufs is None or bufs[0].shape != a.shape:
+            bufs = self.local.bufs = (np.empty(a.shape, np.float32), np.empty(a.shape, np.uint8))
+        work, out = bufs
+        np.subtract(b, a, out=work, dtype=np.float32)
+        work *= t
+        work += a
+        work += 0.5
+        np.copyto(out, work, casting="unsafe")
+        return out
+
+    def url(self, key, pixels):
+        return self._cached(self.encoded, self.max_encoded, key,
+                            lambda: self.encoder.data_url(self.encoder.encode(Image.fromarray(pixels()))))
+
+    def timeline(self, frames, reduce=1):
+        # Yields (image url, seconds to show it); lazily, so the first frame goes out at once.
+        frames = list(frames)
+        hold = STILL_SECONDS if len(frames) == 1 else HOLD_SECONDS
+        for i, path in enumerate(frames):
+            yield self.url((path, reduce), lambda: self.frame(path, reduce)), hold
+            if i + 1 < len(frames):
+                nxt = frames[i + 1]
+                for k in range(1, FADE_STEPS + 1):
+                    t = k / (FADE_STEPS + 1)
+                    pixels = lambda: self.blend(self.frame(path, reduce), self.frame(nxt, reduce), t)
+                    yield self.url((path, nxt, k, reduce), pixels), FADE_SECONDS / FADE_STEPS
+
+    def play(self, placeholder, frames, width, reduce=1):
+        # Paced against the clock, so blending and encoding time comes out of each frame's slot.
+        due = time.perf_counter()
+        for url, seconds in self.timeline(frames, reduce):
+            time.sleep(max(0.0, due - time.perf_counter()))
+            placeholder.image(url, width=width)
+            due += seconds
+        time.sleep(max(0.0, due - time.perf_counter()))
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.encoded.clear()
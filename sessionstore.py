@@ -0,0 +1,147 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from catalog import (DATA_DIR, catalog_bits, check_bits, check_saved_bits, load_catalog, selection_from_mask,
+                     selection_from_state, selection_mask)
+
+# ================================================
+# EXTERNAL SESSION STATE
+# A session's state is reduced to a few dozen bytes (tool bitmask, doses,
+# last result) and kept in a store shared by every app process, keyed by
+# the session id carried in the page URL. Any process behind the load
+# balancer, or a restarted one, can then pick the session back up.
+# ================================================
+SESSION_DIR = os.path.join(DATA_DIR, "sessions")
+SESSION_DB = os.path.join(DATA_DIR, "axon_sessions.sqlite")
+SESSION_TTL = 30 * 24 * 3600
+
+def valid_session_id(sid):
+    return isinstance(sid, str) and len(sid) == 32 and all(c in "0123456789abcdef" for c in sid)
+
+def encode_session(catalog, state):
+    blob = {"m": selection_mask(catalog, selection_from_state(catalog, state))}
+    if state.get("doses"):
+        blob["d"] = {k: [round(float(v[0]), 4), int(v[1])] for k, v in sorted(state["doses"].items())}
+    if state.get("last_outcome") is not None:
+        blob["o"] = int(state["last_outcome"])
+        blob["p"] = round(float(state["last_success"]), 6)
+        if state.get("last_run"):
+            blob["r"] = state["last_run"]
+            if state.get("last_guided"):
+                blob["g"] = 1
+    return json.dumps(blob, separators=(",", ":")).encode()
+
+def decode_session(catalog, data):
+    blob = json.loads(data)
+    selection = selection_from_mask(catalog, blob.get("m", 0))
+    state = {}
+    for cat in catalog.categories:
+        picked = [t for t in catalog.tools_by_category[cat.key] if t.id in selection]
+        if cat.exclusive:
+            state[cat.key] = picked[0].id if picked else None
+            if cat.overlay_slot:
+                state[cat.overlay_slot] = picked[0].overlay if picked else None
+        else:
+            state[cat.key] = {t.id for t in picked}
+    state["doses"] = {k: (v[0], v[1]) for k, v in blob.get("d", {}).items()}
+    if "o" in blob:
+        state["last_outcome"] = bool(blob["o"])
+        state["last_success"] = blob["p"]
+        state["last_run"] = blob.get("r")
+        state["last_guided"] = bool(blob.get("g"))
+    return state
+
+# ================================================
+# STORES
+# ================================================
+class MemorySessionStore:
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def load(self, sid):
+        with self.lock:
+            return self.data.get(sid)
+
+    def save(self, sid, data):
+        with self.lock:
+            self.data[sid] = data
+
+class FileSessionStore:
+    # One small file per session; works on any shared filesystem.
+    def __init__(self, directory=SESSION_DIR, catalog=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        catalog = catalog or load_catalog()
+        path = os.path.join(directory, "catalog_bits.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = {int(bit): tool for bit, tool in json.load(f).items()}
+        except FileNotFoundError:
+            saved = {}
+        # As check_bits does for the SQLite stores, kept as a file beside the sessions.
+        check_saved_bits(saved, catalog)
+        merged = {**saved, **catalog_bits(catalog)}
+        if merged != saved:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(merged, f, sort_keys=True)
+            os.replace(tmp, path)
+
+    def _path(self, sid):
+        return os.path.join(self.directory, f"{sid}.json")
+
+    def load(self, sid):
+        try:
+            with open(self._path(sid), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, sid, data):
+        tmp = f"{self._path(sid)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(sid))
+
+class SQLiteSessionStore:
+    def __init__(self, path=SESSION_DB, ttl=SESSION_TTL, catalog=None):
+        self.path = path
+        self.ttl = ttl
+        with closing(self._connect()) as db:
+            db.execute("CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data BLOB, updated REAL)")
+            check_bits(db, catalog or load_catalog())
+            db.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - ttl,))
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def load(self, sid):
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT data FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, sid, data):
+        with closing(self._connect()) as db:
+            db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", (sid, data, time.time()))
+
+def open_session_store(spec=None):
+    # "off", "memory", "file" / "file:/shared/dir" or "sqlite" / "sqlite:/path"; AXON_SESSION_STORE overrides.
+    spec = spec or os.environ.get("AXON_SESSION_STORE", "off")
+    if spec == "off":
+        return None
+    if spec == "memory":
+        return MemorySessionStore()
+    kind, _, where = spec.partition(":")
+    if kind == "file":
+        return FileSessionStore(where or SESSION_DIR)
+    if kind == "sqlite":
+        return SQLiteSessionStore(where or SESSION_DB)
+    raise ValueError(f"unknown session store: {spec!r}")
@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+from functools import lru_cache
+
+from PIL import Image, ImageOps
+
+from catalog import ROOT, load_catalog
+
+# ================================================
+# TOOLBOX SPRITE SHEETS
+# Built once with `python sprites.py` and committed: every toolbox icon is
+# packed into one WebP sheet per icon size in profiles.json, drawn at twice
+# the display size for high-density screens. Sheets live in static/ under
+# a content-hashed name (server.enableStaticServing in .streamlit/config.toml),
+# so a changed sheet always gets a new URL. Streamlit sends no Cache-Control
+# for app/static/, only ETag and Last-Modified, leaving browsers to guess
+# how long to keep a sheet; the proxy in front of the app should add
+#
+#   location /app/static/sprites/ { add_header Cache-Control "public, max-age=31536000, immutable"; ... }
+#
+# (or its equivalent) so each sheet is fetched once. A tool's icon is then a
+# <div> showing its region of the sheet by CSS offset.
+# ================================================
+STATIC_DIR = os.path.join(ROOT, "static")
+SPRITE_DIR = os.path.join(STATIC_DIR, "sprites")
+SPRITES_PATH = os.path.join(ROOT, "sprites_manifest.json")
+SCALE = 2
+COLUMNS = 4
+GAP = 2
+WEBP_OPTIONS = {"quality": 85, "method": 6}
+
+def _fit(path, size):
+    # Icons keep their aspect ratio, scaled to the display width like st.image does.
+    with Image.open(path) as img:
+        w, h = img.size
+        return ImageOps.contain(img.convert("RGBA"), (size * SCALE, max(1, round(size * SCALE * h / w))))
+
+def build_sheet(paths, size):
+    # Shelf packing, COLUMNS icons per row; rects are in display pixels.
+    icons = [(p, _fit(p, size)) for p in paths]
+    rows = [icons[i:i + COLUMNS] for i in range(0, len(icons), COLUMNS)]
+    cell = size * SCALE + GAP
+    heights = [max(img.height for _, img in row) + GAP for row in rows]
+    sheet = Image.new("RGBA", (cell * min(COLUMNS, len(icons)), sum(heights)))
+    rects = {}
+    y = 0
+    for row, height in zip(rows, heights):
+        for i, (path, img) in enumerate(row):
+            sheet.paste(img, (i * cell, y))
+            rects[os.path.relpath(path, ROOT)] = [i * cell // SCALE, y // SCALE, img.width // SCALE, img.height // SCALE]
+        y += height
+    return sheet, rects
+
+def write_sheet(sheet, size, sprite_dir=SPRITE_DIR):
+    buf = io.BytesIO()
+    sheet.save(buf, "WEBP", **WEBP_OPTIONS)
+    data = buf.getvalue()
+    name = f"toolbox-{size}-{hashlib.blake2b(data, digest_size=8).hexdigest()}.webp"
+    os.makedirs(sprite_dir, exist_ok=True)
+    for old in os.listdir(sprite_dir):
+        if old.startswith(f"toolbox-{size}-"):
+            os.remove(os.path.join(sprite_dir, old))
+    with open(os.path.join(sprite_dir, name), "wb") as f:
+        f.write(data)
+    return name, len(data)
+
+def build_sprites(paths, sizes, out=SPRITES_PATH, sprite_dir=SPRITE_DIR):
+    manifest = {}
+    for size in sorted(set(sizes)):
+        sheet, rects = build_sheet(paths, size)
+        name, nbytes = write_sheet(sheet, size, sprite_dir)
+        manifest[str(size)] = {
+            "url": f"app/static/{os.path.relpath(os.path.join(sprite_dir, name), STATIC_DIR)}",
+            "size": [sheet.width // SCALE, sheet.height // SCALE],
+            "bytes": nbytes,
+            "icons": rects,
+        }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+@lru_cache(maxsize=None)
+def load_sprites(path=SPRITES_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def sprite_sheet(size):
+    # The sheet for this icon size, or None when it hasn't been built.
+    return load_sprites().get(str(size))
+
+# ================================================
+# MARKUP
+# ================================================
+def sprite_css(sheet):
+    return f"""
+<style>
+.tool-sprite {{
+    max-width: 100%;
+    background-image: url("{sheet['url']}");
+    background-repeat: no-repeat;
+}}
+</style>
+"""
+
+def sprite_html(sheet, path):
+    # None for icons missing from the sheet; percentages keep the region right when the column is narrower.
+    rect = sheet["icons"].get(os.path.relpath(path, ROOT))
+    if rect is None:
+        return None
+    x, y, w, h = rect
+    sw, sh = sheet["size"]
+    px = 100 * x / (sw - w) if sw > w else 0
+    py = 100 * y / (sh - h) if sh > h else 0
+    return (
+        f'<div class="tool-sprite" style="width: {w}px; aspect-ratio: {w} / {h}; '
+        f'background-size: {100 * sw / w:.4f}% {100 * sh / h:.4f}%; background-position: {px:.4f}% {py:.4f}%"></div>'
+    )
+
+def main():
+    from profiles import load_profiles
+
+    parser = argparse.ArgumentParser(description="Pack toolbox icons into one sprite sheet per icon size.")
+    parser.add_argument("--sizes", type=int, nargs="*", help="icon sizes (default: every size in profiles.json)")
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    sizes = args.sizes or [p.icon_size for p in load_profiles()[0].values()]
+    manifest = build_sprites([t.icon for t in catalog.tools], sizes)
+    for size, entry in manifest.items():
+        print(f"  {size:>4}px  {entry['url']}  {entry['size'][0]}x{entry['size'][1]}  {entry['bytes'] / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
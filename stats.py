@@ -0,0 +1,213 @@
+import atexit
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from catalog import DATA_DIR, check_bits, load_catalog
+
+# ================================================
+# STREAMING OUTCOME STATISTICS
+# One fixed-size accumulator per configuration (selection mask and dose key):
+# Welford mean/variance of the success probability, a success counter and a fixed-bin histogram. No raw
+# trials are kept, so memory stays flat however many runs are recorded.
+# ================================================
+STATS_PATH = os.path.join(DATA_DIR, "axon_stats.sqlite")
+BINS = 20
+FLUSH_SECONDS = 0.5
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class RunningStats:
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    successes: int = 0
+    hist: list = field(default_factory=lambda: [0] * BINS)
+
+    def add(self, p, outcome):
+        self.n += 1
+        delta = p - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (p - self.mean)
+        self.successes += bool(outcome)
+        self.hist[min(int(p * BINS), BINS - 1)] += 1
+
+    def add_batch(self, p, outcomes):
+        # Fold a numpy batch in with Chan et al.'s pairwise update.
+        if len(p):
+            hist = np.bincount(np.minimum((p * BINS).astype(int), BINS - 1), minlength=BINS)
+            self.merge(RunningStats(len(p), float(p.mean()), float(((p - p.mean()) ** 2).sum()),
+                                    int(outcomes.sum()), hist.tolist()))
+
+    def merge(self, other):
+        if not other.n:
+            return self
+        if not self.n:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            self.successes, self.hist = other.successes, list(other.hist)
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.successes += other.successes
+        self.hist = [a + b for a, b in zip(self.hist, other.hist)]
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def stderr(self):
+        return self.std / math.sqrt(self.n) if self.n else 0.0
+
+    @property
+    def success_rate(self):
+        return self.successes / self.n if self.n else 0.0
+
+    def bin_edges(self):
+        return [i / BINS for i in range(BINS + 1)]
+
+# ================================================
+# PERSISTENCE
+# ================================================
+def _migrate(db, catalog):
+    # outcome_stats, from before stats were keyed by dose, pooled every dose of a selection.
+    # Rows without a dosed tool carry over as they are; the rest are kept under doses '*',
+    # which no dose key matches.
+    db.execute("BEGIN IMMEDIATE")
+    if db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'outcome_stats'").fetchone():
+        dosed = sum(1 << t.bit for t in catalog.tools if t.pk)
+        db.execute(
+            "INSERT OR IGNORE INTO dose_stats SELECT config, CASE WHEN config & ? THEN '*' ELSE '' END,"
+            " n, mean, m2, successes, hist FROM outcome_stats", (dosed,)
+        )
+        db.execute("DROP TABLE outcome_stats")
+    db.execute("COMMIT")
+
+class StatsStore:
+    # Runs are folded into per-configuration pending accumulators and written by a
+    # background thread, as the run log is, so a click never waits on the database;
+    # get() adds what is still pending to what is stored.
+    def __init__(self, path=STATS_PATH, catalog=None):
+        self.path = path
+        with closing(self._connect()) as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS dose_stats ("
+                " config INTEGER, doses TEXT, n INTEGER, mean REAL, m2 REAL,"
+                " successes INTEGER, hist TEXT, PRIMARY KEY (config, doses))"
+            )
+            catalog = catalog or load_catalog()
+            check_bits(db, catalog)
+            _migrate(db, catalog)
+        self.pending = {}
+        self.writing = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closed = False
+        self.writer = threading.Thread(target=self._run, name="stats-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def _stored(self, db, key):
+        row = db.execute(
+            "SELECT n, mean, m2, successes, hist FROM dose_stats WHERE config = ? AND doses = ?", key
+        ).fetchone()
+        if row is None:
+            return RunningStats()
+        n, mean, m2, successes, hist = row
+        return RunningStats(n, mean, m2, successes, json.loads(hist))
+
+    def get(self, config, doses=""):
+        key = (config, doses)
+        # Read again if a flush commits meanwhile, so no run is counted twice or missed.
+        while True:
+            with self.lock:
+                generation = self.generation
+            with closing(self._connect()) as db:
+                stats = self._stored(db, key)
+            with self.lock:
+                if generation != self.generation:
+                    continue
+                for unwritten in (self.writing.get(key), self.pending.get(key)):
+                    if unwritten is not None:
+                        stats.merge(unwritten)
+            return stats
+
+    def record(self, config, p, outcome, doses=""):
+        with self.lock:
+            self.pending.setdefault((config, doses), RunningStats()).add(p, outcome)
+
+    def flush(self):
+        # Folds every pending accumulator into its row in one transaction. On failure they
+        # go back to pending for the next flush; nothing recorded is dropped.
+        with self.flush_lock:
+            with self.lock:
+                self.writing, self.pending = self.pending, {}
+                batch = self.writing
+            if not batch:
+                return 0
+            db = None
+            try:
+                db = self._connect()
+                db.execute("BEGIN IMMEDIATE")
+                for key, added in batch.items():
+                    stats = self._stored(db, key).merge(added)
+                    db.execute(
+                        "INSERT OR REPLACE INTO dose_stats VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (*key, stats.n, stats.mean, stats.m2, stats.successes, json.dumps(stats.hist)),
+                    )
+                with self.lock:
+                    db.execute("COMMIT")
+                    self.writing = {}
+                    self.generation += 1
+            except (sqlite3.Error, OSError) as exc:
+                if db is not None and db.in_transaction:
+                    db.execute("ROLLBACK")
+                with self.lock:
+                    for key, added in self.pending.items():
+                        batch.setdefault(key, RunningStats()).merge(added)
+                    self.writing, self.pending = {}, batch
+                log.warning("stats flush of %d configurations failed, will retry: %s", len(batch), exc)
+                return 0
+            finally:
+                if db is not None:
+                    db.close()
+            return len(batch)
+
+    def _run(self):
+        while not self.closed:
+            self.wake.wait(FLUSH_SECONDS)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("stats writer error")
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.wake.set()
+            self.writer.join(timeout=5)
+            self.flush()
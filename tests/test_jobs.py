@@ -0,0 +1,59 @@
+from concurrent.futures import wait
+
+from cache import MemoryCache
+from jobs import JobQueue
+
+SELECTION = frozenset({"KLF7", "Schwann"})
+
+def test_identical_requests_share_a_job():
+    queue = JobQueue(workers=1, cache=MemoryCache())
+    try:
+        assert queue.executor is None
+        job = queue.submit(SELECTION, trials=2_000)
+        assert queue.submit(SELECTION, trials=2_000) is job
+        assert queue.submit(SELECTION, trials=3_000) is not job
+        wait(job.futures, timeout=120)
+        assert job.status == "done"
+        assert job.partial().n == 2_000
+        assert queue.submit(SELECTION, trials=2_000) is job
+    finally:
+        queue.shutdown()
+
+def test_finished_results_come_from_the_cache():
+    cache = MemoryCache()
+    queue = JobQueue(workers=1, cache=cache)
+    try:
+        job = queue.submit(SELECTION, trials=2_000)
+        wait(job.futures, timeout=120)
+        job.viewed -= 3600
+        queue.evict()
+        again = queue.submit(SELECTION, trials=2_000)
+        assert again is not job and again.status == "done"
+        assert again.partial().n == 2_000
+    finally:
+        queue.shutdown()
+
+def test_shutdown_cancels_pending_chunks_and_restarts_lazily():
+    queue = JobQueue(workers=1)
+    job = queue.submit(SELECTION, trials=400_000)
+    queue.shutdown()
+    assert queue.executor is None
+    assert job.status == "cancelled"
+    assert sum(f.cancelled() for f in job.futures) >= len(job.futures) - 2
+    again = queue.submit(SELECTION, trials=400_000)
+    assert again is not job and queue.executor is not None
+    queue.shutdown()
+
+def test_eviction_keeps_jobs_a_session_is_showing():
+    queue = JobQueue(workers=1, cache=MemoryCache())
+    try:
+        shown = queue.submit(SELECTION, trials=2_000)
+        idle = queue.submit(frozenset({"Laminin"}), trials=2_000)
+        wait(shown.futures + idle.futures, timeout=120)
+        idle.viewed -= 3600
+        queue.get(shown.id)
+        queue.evict()
+        assert queue.get(shown.id) is shown
+        assert queue.get(idle.id) is None
+    finally:
+        queue.shutdown()
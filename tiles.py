@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from assets import layer_bbox, layer_info, load_layer, load_sprite
+from encoding import Encoder
+
+# ================================================
+# TILED CANVAS
+# The canvas is cut into fixed tiles. A tile's pixels depend only on the
+# base and the overlays whose opaque box touches it, so that is its cache
+# key: tiles untouched by any overlay are shared by every configuration,
+# and switching one scaffold only recomposites and re-encodes the tiles
+# under the old and new scaffold.
+# ================================================
+TILE_SIZE = 128
+MAX_TILES = 1024
+MAX_ENCODED = 4096
+MAX_FRAMES = 32
+
+def _bbox(layer, reduce):
+    # Layers are image paths or drawn layers (such as outcome.RunLayer) that place their own sprite.
+    return layer_bbox(layer, reduce) if isinstance(layer, str) else layer.bbox(reduce)
+
+def _sprite(layer, reduce):
+    return load_sprite(layer, reduce) if isinstance(layer, str) else layer.sprite(reduce)
+
+class TileRenderer:
+    def __init__(self, tile_size=TILE_SIZE, encoder=None, max_tiles=MAX_TILES, max_encoded=MAX_ENCODED,
+                 max_frames=MAX_FRAMES):
+        self.tile_size = tile_size
+        self.encoder = encoder or Encoder.from_spec()
+        self.max_tiles = max_tiles
+        self.max_encoded = max_encoded
+        self.max_frames = max_frames
+        self.tiles = OrderedDict()
+        self.encoded = OrderedDict()
+        self.frames = OrderedDict()
+        self.lock = threading.Lock()
+
+    # ---------------------------------------------
+    # GEOMETRY
+    # ---------------------------------------------
+    def canvas_size(self, base, reduce):
+        w, h = layer_info(base)["size"]
+        return -(-w // reduce), -(-h // reduce)
+
+    def grid(self, base, reduce):
+        w, h = self.canvas_size(base, reduce)
+        t = self.tile_size
+        return [(ix, iy) for iy in range(-(-h // t)) for ix in range(-(-w // t))]
+
+    def tile_box(self, base, reduce, ix, iy):
+        w, h = self.canvas_size(base, reduce)
+        t = self.tile_size
+        return ix * t, iy * t, min((ix + 1) * t, w), min((iy + 1) * t, h)
+
+    def keys(self, layers, reduce):
+        # {(ix, iy): cache key} for every tile of this configuration.
+        base, overlays = layers[0], [p for p in layers[1:] if p]
+        boxes = [(p, _bbox(p, reduce)) for p in overlays]
+        t = self.tile_size
+        keys = {}
+        for ix, iy in self.grid(base, reduce):
+            x0, y0 = ix * t, iy * t
+            touching = tuple(p for p, (bx0, by0, bx1, by1) in boxes
+                             if bx0 < x0 + t and x0 < bx1 and by0 < y0 + t and y0 < by1)
+            keys[ix, iy] = (base, touching, reduce, ix, iy)
+        return keys
+
+    def changed(self, old_layers, layers, reduce):
+        new = self.keys(layers, reduce)
+        if not old_layers:
+            return new
+        old = self.keys(old_layers, reduce)
+        return {pos: key for pos, key in new.items() if old.get(pos) != key}
+
+    # ---------------------------------------------
+    # PIXELS
+    # ---------------------------------------------
+    def _cached(self, store, limit, key, make):
+        with self.lock:
+            if key in store:
+                store.move_to_end(key)
+                return store[key]
+        value = make()
+        with self.lock:
+            store[key] = value
+            while len(store) > limit:
+                store.popitem(last=False)
+        return value
+
+    def _composite(self, key):
+        base, touching, reduce, ix, iy = key
+        box = self.tile_box(base, reduce, ix, iy)
+        tile = load_layer(base, reduce).crop(box)
+        for path in touching:
+            sprite, (sx, sy) = _sprite(path, reduce)
+            x0, y0 = max(box[0], sx), max(box[1], sy)
+            x1, y1 = min(box[2], sx + sprite.width), min(box[3], sy + sprite.height)
+            if x1 > x0 and y1 > y0:
+                tile.alpha_composite(sprite, dest=(x0 - box[0], y0 - box[1]), source=(x0 - sx, y0 - sy, x1 - sx, y1 - sy))
+        return tile
+
+    def tile(self, key):
+        return self._cached(self.tiles, self.max_tiles, key, lambda: self._composite(key))
+
+    def tile_url(self, key):
+        return self._cached(self.encoded, self.max_encoded, key,
+                            lambda: self.encoder.data_url(self.encoder.encode(self.tile(key))))
+
+    def render(self, layers, reduce=1):
+        canvas = Image.new("RGBA", self.canvas_size(layers[0], reduce))
+        for (ix, iy), key in self.keys(layers, reduce).items():
+            canvas.paste(self.tile(key), (ix * self.tile_size, iy * self.tile_size))
+        return canvas
+
+    def frame_url(self, layers, reduce=1):
+        # A whole encoded frame, memoized by composite, for st.image to pass through untouched.
+        key = (tuple(p for p in layers if p), reduce)
+        return self._cached(self.frames, self.max_frames, key,
+                            lambda: self.encoder.data_url(self.encoder.encode(self.render(layers, reduce))))
+
+    def clear(self):
+        with self.lock:
+            self.tiles.clear()
+            self.encoded.clear()
+            self.frames.clear()
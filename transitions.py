@@ -0,0 +1,133 @@
+import argparse
+import base64
+import hashlib
+import io
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from catalog import DATA_DIR, load_catalog
+from sequencer import STILL_SECONDS
+
+# ================================================
+# CANVAS TRANSITIONS
+# A tool that adds or swaps an overlay fades the canvas the user is looking
+# at into the new one. Each (from, to) pair is rendered once from the tile
+# renderer's composites into a small animated WebP that plays once; the
+# encoder stores only the changed region of each frame. Files are kept
+# under DATA_DIR/transitions, named by the pair, so any process reuses
+# them, and playing one costs no compositing. Only image layers fade; a
+# drawn run (outcome.RunLayer) stays on top, so the set of pairs is bounded
+# and `python transitions.py` prerenders all of them.
+# ================================================
+TRANSITION_DIR = os.path.join(DATA_DIR, "transitions")
+FADE_STEPS = 6
+STEP_MS = 60
+# The whole transition takes as long as a still animation is shown.
+TOTAL_MS = int(STILL_SECONDS * 1000)
+WEBP_OPTIONS = {"quality": 80, "method": 4}
+MAX_URLS = 64
+
+def _layer_id(path):
+    # Paths carry their file version.
+    st = os.stat(path)
+    return f"{path}:{st.st_size}:{st.st_mtime_ns}"
+
+def transition_name(old_layers, layers, reduce=1):
+    parts = [*map(_layer_id, old_layers), "->", *map(_layer_id, layers), reduce, FADE_STEPS, STEP_MS, TOTAL_MS]
+    return hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=10).hexdigest() + ".webp"
+
+class TransitionStore:
+    def __init__(self, renderer, directory=TRANSITION_DIR, max_urls=MAX_URLS):
+        self.renderer = renderer
+        self.directory = directory
+        self.max_urls = max_urls
+        self.urls = OrderedDict()
+        self.lock = threading.Lock()
+
+    def render(self, old_layers, layers, reduce=1):
+        a = np.asarray(self.renderer.render(old_layers, reduce).convert("RGB"), np.float32)
+        b = np.asarray(self.renderer.render(layers, reduce).convert("RGB"), np.float32)
+        diff = b - a
+        frames = [Image.fromarray((a + diff * (k / FADE_STEPS) + 0.5).astype(np.uint8)) for k in range(FADE_STEPS + 1)]
+        durations = [STEP_MS] * FADE_STEPS + [max(STEP_MS, TOTAL_MS - STEP_MS * FADE_STEPS)]
+        buf = io.BytesIO()
+        frames[0].save(buf, "WEBP", save_all=True, append_images=frames[1:], duration=durations, loop=1, **WEBP_OPTIONS)
+        return buf.getvalue()
+
+    def path(self, old_layers, layers, reduce=1):
+        old_layers = [p for p in old_layers if isinstance(p, str)]
+        layers = [p for p in layers if isinstance(p, str)]
+        target = os.path.join(self.directory, transition_name(old_layers, layers, reduce))
+        if not os.path.exists(target):
+            data = self.render(old_layers, layers, reduce)
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        return target
+
+    def url(self, old_layers, layers, reduce=1):
+        # A data URL for st.image, which passes it through untouched.
+        target = self.path(old_layers, layers, reduce)
+        with self.lock:
+            if target in self.urls:
+                self.urls.move_to_end(target)
+                return self.urls[target]
+        with open(target, "rb") as f:
+            url = f"data:image/webp;base64,{base64.b64encode(f.read()).decode()}"
+        with self.lock:
+            self.urls[target] = url
+            while len(self.urls) > self.max_urls:
+                self.urls.popitem(last=False)
+        return url
+
+    def play(self, placeholder, old_layers, layers, width, reduce=1):
+        placeholder.image(self.url(old_layers, layers, reduce), width=width)
+        time.sleep(TOTAL_MS / 1000)
+
+    def clear(self):
+        with self.lock:
+            self.urls.clear()
+
+# ================================================
+# PRERENDERING
+# ================================================
+def overlay_states(catalog):
+    # Every combination of one overlay (or none) per slot, as canvas layers.
+    choices = []
+    for slot in catalog.overlay_order:
+        cats = [c for c in catalog.categories if c.overlay_slot == slot]
+        choices.append([None] + [t.overlay for c in cats for t in catalog.tools_by_category[c.key] if t.overlay])
+    return [[catalog.base_image, *combo] for combo in itertools.product(*choices)]
+
+def main():
+    from tiles import TileRenderer
+
+    parser = argparse.ArgumentParser(description="Prerender canvas transitions for every overlay change.")
+    parser.add_argument("--reduce", type=int, nargs="*", default=[1])
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    fading = {t.overlay for t in catalog.tools if t.transition and t.overlay}
+    store = TransitionStore(TileRenderer())
+    states = overlay_states(catalog)
+    count = 0
+    start = time.perf_counter()
+    for reduce in args.reduce:
+        for old, new in itertools.permutations(states, 2):
+            # Using a tool changes exactly one slot, to that tool's overlay.
+            changed = [n for o, n in zip(old, new) if o != n]
+            if len(changed) == 1 and changed[0] in fading:
+                store.path(old, new, reduce)
+                count += 1
+    print(f"{count} transitions in {store.directory} ({time.perf_counter() - start:.1f}s)")
+
+if __name__ == "__main__":
+    main()